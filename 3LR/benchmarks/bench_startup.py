@@ -0,0 +1,87 @@
+"""Замер времени запуска get-weather
+
+Запускает CLI в отдельных процессах для --help, попадания в кеш и
+(для сравнения) голого импорта requests, печатает медиану и p90 в мс.
+
+    python benchmarks/bench_startup.py --runs 30
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from simple_openweather_client.client import OpenWeatherClient
+
+RUN_CLI = """
+import sys
+from simple_openweather_client.client import main
+sys.argv = ['get-weather'] + sys.argv[1:]
+try:
+    main()
+except SystemExit:
+    pass
+"""
+
+SAMPLE_PAYLOAD = {
+    "name": "Moscow",
+    "sys": {"country": "RU"},
+    "main": {"temp": 15.5, "feels_like": 14.0, "humidity": 65, "pressure": 1013},
+    "weather": [{"description": "ясно"}],
+    "wind": {"speed": 3.5, "deg": 180}
+}
+
+
+def measure(command, env, runs):
+    """Время выполнения команды в мс для каждого из runs запусков"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер времени запуска get-weather")
+    parser.add_argument("--runs", type=int, default=20, help="Число запусков на сценарий")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        client = OpenWeatherClient(api_key="bench")
+        client.cache_dir = Path(home) / ".openweather_cache"
+        client.cache_dir.mkdir()
+        client._save_to_cache("current_Moscow_metric", SAMPLE_PAYLOAD)
+
+        env = dict(os.environ, HOME=home, PYTHONPATH=str(SRC_DIR), OPENWEATHER_API_KEY="bench")
+        scenarios = {
+            "python -c pass": [sys.executable, "-c", "pass"],
+            "import requests": [sys.executable, "-c", "import requests"],
+            "get-weather --help": [sys.executable, "-c", RUN_CLI, "--help"],
+            "get-weather (кеш)": [sys.executable, "-c", RUN_CLI, "Moscow"],
+        }
+        results = {}
+        for name, command in scenarios.items():
+            timings = sorted(measure(command, env, args.runs))
+            results[name] = {
+                "median_ms": round(statistics.median(timings), 1),
+                "p90_ms": round(timings[int(len(timings) * 0.9) - 1], 1),
+            }
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    for name, stats in results.items():
+        print(f"{name:<22} медиана {stats['median_ms']:>7} мс   p90 {stats['p90_ms']:>7} мс")
+
+
+if __name__ == "__main__":
+    main()
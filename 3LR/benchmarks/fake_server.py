@@ -0,0 +1,145 @@
+"""Локальная заглушка OpenWeather API для нагрузочных тестов
+
+Отвечает на /data/2.5/weather и /data/2.5/forecast правдоподобными
+данными с настраиваемой задержкой, долей ошибок и размером ответа.
+
+    python benchmarks/fake_server.py --port 8765 --latency 0.05 --error-rate 0.01
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8765/data/2.5 OPENWEATHER_API_KEY=x get-weather Moscow
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeOpenWeatherServer(ThreadingHTTPServer):
+    """HTTP сервер, имитирующий OpenWeather
+
+    latency - средняя задержка ответа в секундах (с разбросом ±jitter),
+    error_rate - доля ответов с кодом error_status,
+    padding - сколько байт лишних данных добавлять в каждый ответ.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=500, padding=0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.padding = "x" * padding
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/data/2.5"
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+
+def start_fake_server(**options):
+    """Запустить заглушку в фоновом потоке, вернуть сервер (base_url - в server.base_url)"""
+    server = FakeOpenWeatherServer(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def current_payload(city, padding):
+    return {
+        "name": city,
+        "sys": {"country": "RU"},
+        "main": {"temp": 15.5, "feels_like": 14.0, "humidity": 65, "pressure": 1013},
+        "weather": [{"description": "ясно"}],
+        "wind": {"speed": 3.5, "deg": 180},
+        "padding": padding,
+    }
+
+
+def forecast_payload(city, count, padding):
+    items = []
+    for i in range(count):
+        day, hour = divmod(i, 8)
+        items.append({
+            "dt_txt": f"2024-01-{day + 1:02d} {hour * 3:02d}:00:00",
+            "main": {"temp": 10.0 + day, "feels_like": 8.0 + day, "humidity": 70},
+            "weather": [{"description": "облачно"}],
+            "wind": {"speed": 2.0, "deg": 90},
+        })
+    return {"city": {"name": city, "country": "RU"}, "list": items, "padding": padding}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        if server.latency or server.jitter:
+            time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        city = params.get("q", ["Moscow"])[0].split(",")[0]
+
+        if random.random() < server.error_rate:
+            self._reply(server.error_status, {"cod": server.error_status, "message": "fake error"})
+        elif url.path.endswith("/weather"):
+            self._reply(200, current_payload(city, server.padding))
+        elif url.path.endswith("/forecast"):
+            count = int(params.get("cnt", ["40"])[0])
+            self._reply(200, forecast_payload(city, count, server.padding))
+        else:
+            self._reply(404, {"cod": "404", "message": "not found"})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Логи на каждый запрос только мешают замерам
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная заглушка OpenWeather API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Средняя задержка ответа, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Разброс задержки, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой (0..1)")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP статус ошибочных ответов")
+    parser.add_argument("--padding", type=int, default=0, help="Лишние байты в каждом ответе")
+    args = parser.parse_args()
+
+    server = FakeOpenWeatherServer(
+        (args.host, args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        padding=args.padding
+    )
+    print(f"Заглушка OpenWeather: OPENWEATHER_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
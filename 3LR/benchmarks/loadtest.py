@@ -0,0 +1,203 @@
+"""Нагрузочный тест OpenWeatherClient на локальной заглушке API
+
+Поднимает fake_server и гоняет клиент в трех режимах с растущей
+конкурентностью, без сети и без API ключа:
+
+    sync  - пул потоков, каждый вызывает OpenWeatherClient напрямую
+    async - asyncio: вызовы клиента через run_in_executor под семафором
+            (асинхронного клиента в пакете нет, это типичная обвязка над ним)
+    bulk  - отдельный процесс get-weather --bulk с --workers = конкурентность
+
+Для каждого режима и уровня печатает пропускную способность, задержки
+p50/p95/p99, долю ответов из кеша и число запросов, дошедших до API.
+
+    python benchmarks/loadtest.py --latency 0.05 --concurrency 1,8,32 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fake_server import start_fake_server
+from simple_openweather_client.client import OpenWeatherClient
+
+RUN_CLI = """
+import sys
+from simple_openweather_client.client import main
+sys.argv = ['get-weather'] + sys.argv[1:]
+main()
+"""
+
+
+def make_workload(requests, cities, forecast_share, seed):
+    """Список вызовов (город, дней прогноза или None) с повторами городов"""
+    rng = random.Random(seed)
+    pool = [f"City{i}" for i in range(cities)]
+    return [
+        (rng.choice(pool), rng.randint(1, 5) if rng.random() < forecast_share else None)
+        for _ in range(requests)
+    ]
+
+
+def make_client(server, cache_dir, memory_cache_size):
+    client = OpenWeatherClient(api_key="bench", memory_cache_size=memory_cache_size)
+    client.base_url = server.base_url
+    client.cache_dir = Path(cache_dir)
+    return client
+
+
+def call(client, city, days):
+    """Один вызов клиента: (длительность в секундах, успех)"""
+    started = time.perf_counter()
+    try:
+        if days:
+            client.get_forecast(city, days=days)
+        else:
+            client.get_current_weather(city)
+        ok = True
+    except Exception:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_sync(client, workload, concurrency):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda job: call(client, *job), workload))
+
+
+def run_async(client, workload, concurrency):
+    async def runner():
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            async def one(job):
+                async with semaphore:
+                    return await loop.run_in_executor(executor, call, client, *job)
+            return await asyncio.gather(*(one(job) for job in workload))
+    return asyncio.run(runner())
+
+
+def run_bulk(server, workload, concurrency, home):
+    """Прогон через CLI: одна строка входа на вызов; задержки отдельных вызовов не видны"""
+    cities_file = Path(home) / "cities.txt"
+    cities_file.write_text("".join(f"{city}\n" for city, _ in workload), encoding="utf-8")
+    env = dict(
+        os.environ,
+        HOME=home,
+        PYTHONPATH=str(SRC_DIR),
+        OPENWEATHER_API_KEY="bench",
+        OPENWEATHER_BASE_URL=server.base_url,
+        OPENWEATHER_DAEMON_SOCKET=str(Path(home) / "no-daemon.sock"),
+    )
+    Path(home, ".openweather_cache").mkdir(exist_ok=True)
+    result = subprocess.run(
+        [sys.executable, "-c", RUN_CLI, "--bulk", str(cities_file), "--workers", str(concurrency)],
+        env=env, capture_output=True, text=True, check=False
+    )
+    return [json.loads(line) for line in result.stdout.splitlines()]
+
+
+def percentile(sorted_values, share):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(share * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 2)
+
+
+def run_level(mode, server, workload, concurrency, memory_cache_size):
+    upstream_before = server.requests
+    with tempfile.TemporaryDirectory() as home:
+        started = time.perf_counter()
+        if mode == "bulk":
+            records = run_bulk(server, workload, concurrency, home)
+            elapsed = time.perf_counter() - started
+            latencies, errors = [], sum('ошибка' in record for record in records)
+            cache_hits = None
+        else:
+            client = make_client(server, home, memory_cache_size)
+            runner = run_sync if mode == "sync" else run_async
+            results = runner(client, workload, concurrency)
+            elapsed = time.perf_counter() - started
+            latencies = sorted(duration for duration, _ in results)
+            errors = sum(not ok for _, ok in results)
+            cache = client.stats.snapshot()["cache"]
+            cache_hits = sum(count for name, count in cache.items() if name.endswith((".hit", ".stale")))
+
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(workload),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(workload) / elapsed, 1),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "cache_hit_ratio": None if cache_hits is None else round(cache_hits / len(workload), 3),
+        "upstream_requests": server.requests - upstream_before,
+    }
+
+
+def format_row(row):
+    def show(value):
+        return "-" if value is None else str(value)
+    return (
+        f"{row['mode']:<6}{row['concurrency']:>6}{row['requests']:>8}{row['errors']:>7}"
+        f"{row['throughput_rps']:>10}{show(row['p50_ms']):>9}{show(row['p95_ms']):>9}{show(row['p99_ms']):>9}"
+        f"{show(row['cache_hit_ratio']):>8}{row['upstream_requests']:>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест OpenWeatherClient без сети")
+    parser.add_argument("--modes", default="sync,async,bulk", help="Режимы через запятую: sync, async, bulk")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Уровни конкурентности через запятую")
+    parser.add_argument("--requests", type=int, default=400, help="Вызовов клиента на каждый уровень")
+    parser.add_argument("--cities", type=int, default=50, help="Размер набора городов (меньше - больше попаданий в кеш)")
+    parser.add_argument("--forecast-share", type=float, default=0.3, help="Доля запросов прогноза (не для bulk)")
+    parser.add_argument("--memory-cache-size", type=int, default=0, help="Размер кеша в памяти клиента")
+    parser.add_argument("--latency", type=float, default=0.02, help="Задержка заглушки, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Разброс задержки заглушки, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ошибок заглушки")
+    parser.add_argument("--padding", type=int, default=0, help="Лишние байты в ответах заглушки")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Вывести результаты в JSON")
+    args = parser.parse_args()
+
+    server = start_fake_server(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, padding=args.padding
+    )
+    workload = make_workload(args.requests, args.cities, args.forecast_share, args.seed)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    rows = []
+    if not args.json:
+        print(f"{'режим':<6}{'конк.':>6}{'вызовы':>8}{'ошибки':>7}{'rps':>10}{'p50 мс':>9}{'p95 мс':>9}"
+              f"{'p99 мс':>9}{'кеш':>8}{'к API':>8}")
+    for mode in args.modes.split(","):
+        mode_workload = [(city, None) for city, _ in workload] if mode == "bulk" else workload
+        for level in levels:
+            row = run_level(mode, server, mode_workload, level, args.memory_cache_size)
+            rows.append(row)
+            if not args.json:
+                print(format_row(row), flush=True)
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
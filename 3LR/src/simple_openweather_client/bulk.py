@@ -0,0 +1,111 @@
+"""Пакетный режим get-weather: много городов за один запуск"""
+import csv
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+CURRENT_CSV_FIELDS = [
+    'запрос', 'город', 'страна', 'температура', 'ощущается', 'влажность',
+    'давление', 'погода', 'ветер', 'направление ветра', 'ошибка'
+]
+FORECAST_CSV_FIELDS = [
+    'запрос', 'город', 'страна', 'дата', 'средняя температура', 'погода',
+    'количество прогнозов', 'ошибка'
+]
+
+
+def read_cities(stream):
+    """Построчно читать города из потока: "Город" или "Город,КОД_СТРАНЫ"
+
+    Пустые строки и строки, начинающиеся с #, пропускаются.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        city, _, country = line.partition(',')
+        yield city.strip(), country.strip() or None
+
+
+def fetch_all(client, cities, workers=8, forecast=None, units="metric"):
+    """Получить погоду для всех городов, отдавая результаты по мере готовности
+
+    Одновременно в работе не больше workers * 2 городов, поэтому память
+    не зависит от размера входного списка.
+    """
+    def fetch(city, country):
+        query = f"{city},{country}" if country else city
+        try:
+            if forecast:
+                result = client.get_forecast(city, country, units=units, days=forecast)
+            else:
+                result = client.get_current_weather(city, country, units=units)
+            return {'запрос': query, 'результат': result}
+        except Exception as e:
+            return {'запрос': query, 'ошибка': _error_message(e)}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for city, country in cities:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(fetch, city, country))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def write_ndjson(records, out):
+    """Писать каждый результат отдельной JSON-строкой. Возвращает число ошибок"""
+    errors = 0
+    for record in records:
+        errors += 'ошибка' in record
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+    return errors
+
+
+def write_csv(records, out, forecast=None):
+    """Писать результаты в CSV (для прогноза - строка на каждый день). Возвращает число ошибок"""
+    writer = csv.DictWriter(
+        out,
+        fieldnames=FORECAST_CSV_FIELDS if forecast else CURRENT_CSV_FIELDS,
+        restval='',
+        extrasaction='ignore'
+    )
+    writer.writeheader()
+    errors = 0
+    for record in records:
+        if 'ошибка' in record:
+            errors += 1
+            writer.writerow(record)
+        elif forecast:
+            result = record['результат']
+            for day in result['прогнозы']:
+                writer.writerow(dict(day, запрос=record['запрос'], город=result['город'], страна=result['страна']))
+        else:
+            writer.writerow(dict(record['результат'], запрос=record['запрос']))
+        out.flush()
+    return errors
+
+
+def _error_message(error):
+    """Короткое описание ошибки без API ключа (он есть в URL запроса)
+
+    Статус берется из ответа requests, а у ошибок демона (DaemonError) - из status_code.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'status_code', None)
+    if status == 401:
+        return "Неверный API ключ"
+    if status == 404:
+        return "Город не найден"
+    if status is not None:
+        return f"Ошибка API: HTTP {status}"
+    return re.sub(r'appid=[^&\s]+', 'appid=***', str(error))
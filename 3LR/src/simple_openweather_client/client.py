@@ -1,33 +1,81 @@
-import requests
+import hashlib
 import json
 import sys
+import zlib
+import threading
+import time
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
 import os
 from pathlib import Path
 
+from .metrics import ClientStats
+
+# Прогноз всегда запрашивается на максимальный период, меньшие вырезаются из него
+MAX_FORECAST_DAYS = 5
+FORECASTS_PER_DAY = 8  # 8 записей в день (каждые 3 часа)
+
+TEMPERATURE_SYMBOLS = {"metric": "°C", "imperial": "°F"}
+TEMPERATURE_FIELDS = ("temp", "feels_like", "temp_min", "temp_max")
+WIND_SPEED_FIELDS = ("speed", "gust")
+MPS_TO_MPH = 2.23694
+
+CACHE_TTL = timedelta(minutes=10)
+MAX_RETRIES = 3  # повторы запроса после ответа 429 Too Many Requests
+# Заголовок файла кеша; при смене формата записи со старой версией игнорируются
+CACHE_FORMAT = b"OWC\x01"
+# Сколько ключей с наибольшим числом запросов refresh-ahead помнит между проходами
+REFRESH_TRACKED_KEYS = 1000
+
+def __getattr__(name):
+    """Ленивый доступ к client.requests
+
+    requests - самый тяжелый импорт пакета, а при --help или попадании
+    в кеш сеть не нужна, поэтому модуль загружается только при запросе к API.
+    """
+    if name == "requests":
+        import requests
+        return requests
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 class OpenWeatherClient:
     """Простой клиент для OpenWeather API"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, stale_while_revalidate=None, rate_limiter=None,
+                 memory_cache_size=0, stats=None):
         self.api_key = api_key or os.getenv("OPENWEATHER_API_KEY")
         if not self.api_key:
             raise ValueError("API ключ не указан. Установите OPENWEATHER_API_KEY или передайте в конструктор")
         
-        self.base_url = "https://api.openweathermap.org/data/2.5"
+        # OPENWEATHER_BASE_URL позволяет направить клиент на локальную заглушку API
+        self.base_url = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5")
         self.cache_dir = Path.home() / ".openweather_cache"
         self.cache_dir.mkdir(exist_ok=True)
+        self.cache_ttl = CACHE_TTL
+        # Сколько после истечения TTL запись еще отдается сразу, обновляясь в фоне
+        self.stale_ttl = stale_while_revalidate
+        # RateLimiter/FileRateLimiter; один объект можно делить между клиентами
+        self.rate_limiter = rate_limiter
+        self.max_retries = MAX_RETRIES
+        # Размер кеша в памяти перед файловым (0 - не использовать), нужен
+        # долгоживущим процессам вроде get-weather-daemon
+        self.memory_cache_size = memory_cache_size
+        # ClientStats или объект с теми же методами record_*
+        self.stats = stats if stats is not None else ClientStats()
+        
+        self._lock = threading.Lock()
+        self._memory_cache = OrderedDict()
+        self._inflight = {}
+        self._refreshing = set()
+        self._key_hits = Counter()
+        self._requests_by_key = {}
+        self._refresh_ahead_stop = None
         
     def get_current_weather(self, city, country=None, units="metric"):
         """Получить текущую погоду для города"""
         query = f"{city},{country}" if country else city
         cache_key = f"current_{query}_{units}"
         
-        # Проверка кеша
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
-            
-        # API запрос
         url = f"{self.base_url}/weather"
         params = {
             "q": query,
@@ -35,70 +83,287 @@ class OpenWeatherClient:
             "units": units,
             "lang": "ru"
         }
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Сохранение в кеш
-        self._save_to_cache(cache_key, data)
+        data = self._cached_request(cache_key, url, params)
         
         return self._format_current_weather(data)
     
     def get_forecast(self, city, country=None, units="metric", days=1):
         """Получить прогноз погоды на несколько дней"""
-        if days < 1 or days > 5:
-            raise ValueError("Допустимое количество дней: от 1 до 5")
+        if days < 1 or days > MAX_FORECAST_DAYS:
+            raise ValueError(f"Допустимое количество дней: от 1 до {MAX_FORECAST_DAYS}")
             
         query = f"{city},{country}" if country else city
-        cache_key = f"forecast_{query}_{units}_{days}"
+        # Ключ не зависит от дней и единиц: в кеше лежит полный метрический прогноз
+        cache_key = f"forecast_{query}"
         
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
-            
         url = f"{self.base_url}/forecast"
         params = {
             "q": query,
             "appid": self.api_key,
-            "units": units,
+            "units": "metric",
             "lang": "ru",
-            "cnt": days * 8  # 8 записей в день (каждые 3 часа)
+            "cnt": MAX_FORECAST_DAYS * FORECASTS_PER_DAY
         }
+        data = self._cached_request(cache_key, url, params)
+        
+        data = dict(data, list=data['list'][:days * FORECASTS_PER_DAY])
+        if units == "imperial":
+            data = self._convert_forecast_to_imperial(data)
         
-        response = requests.get(url, params=params)
+        return self._format_forecast(data, days, units)
+    
+    def start_refresh_ahead(self, top_n=10, interval=60):
+        """Держать в кеше свежими данные для top_n самых запрашиваемых городов"""
+        self.stop_refresh_ahead()
+        stop = threading.Event()
+        self._refresh_ahead_stop = stop
+        
+        def loop():
+            while not stop.wait(interval):
+                self._refresh_hottest(top_n, interval)
+        
+        threading.Thread(target=loop, name="openweather-refresh-ahead", daemon=True).start()
+    
+    def stop_refresh_ahead(self):
+        """Остановить фоновое обновление популярных городов"""
+        if self._refresh_ahead_stop is not None:
+            self._refresh_ahead_stop.set()
+            self._refresh_ahead_stop = None
+    
+    def _refresh_hottest(self, top_n, interval):
+        """Обновить популярные записи, которые истекут до следующего прохода
+
+        Счетчики запросов затухают вдвое за проход: ключи, которые перестали
+        запрашивать, выпадают, и всего хранится не больше REFRESH_TRACKED_KEYS.
+        """
+        with self._lock:
+            hottest = [key for key, _ in self._key_hits.most_common(top_n)]
+            requests_by_key = {key: self._requests_by_key[key] for key in hottest}
+            kept = Counter({
+                key: hits // 2
+                for key, hits in self._key_hits.most_common(REFRESH_TRACKED_KEYS)
+                if hits // 2
+            })
+            self._key_hits = kept
+            self._requests_by_key = {key: self._requests_by_key[key] for key in kept}
+        for key in hottest:
+            entry = self._read_cache(key)
+            if entry and datetime.now() - entry[1] < self.cache_ttl - timedelta(seconds=interval):
+                continue
+            url, params = requests_by_key[key]
+            try:
+                self._fetch(key, url, params)
+            except Exception:
+                # Ошибка фонового обновления не должна ронять планировщик
+                pass
+    
+    def _cached_request(self, cache_key, url, params):
+        """Получить данные из кеша или API с учетом stale-while-revalidate"""
+        # Популярность ключей нужна только планировщику, иначе память росла бы
+        # с каждым новым городом (например, в пакетном режиме)
+        if self._refresh_ahead_stop is not None:
+            with self._lock:
+                self._key_hits[cache_key] += 1
+                self._requests_by_key[cache_key] = (url, params)
+        
+        entry, tier = self._lookup_cache(cache_key)
+        if self.memory_cache_size and tier != "memory":
+            self.stats.record_cache("memory", "miss")
+        if entry is None and self.cache_dir is not None:
+            self.stats.record_cache("disk", "miss")
+        if entry:
+            data, cached_at = entry
+            age = datetime.now() - cached_at
+            if age < self.cache_ttl:
+                self.stats.record_cache(tier, "hit")
+                return data
+            if self.stale_ttl and age < self.cache_ttl + self.stale_ttl:
+                self.stats.record_cache(tier, "stale")
+                self._refresh_in_background(cache_key, url, params)
+                return data
+            self.stats.record_cache(tier, "expired")
+        
+        return self._fetch_once(cache_key, url, params)
+    
+    def _fetch_once(self, cache_key, url, params):
+        """Запрос к API, объединяющий одновременные промахи по одному ключу"""
+        with self._lock:
+            call = self._inflight.get(cache_key)
+            leader = call is None
+            if leader:
+                call = self._inflight[cache_key] = {'done': threading.Event()}
+        
+        if not leader:
+            call['done'].wait()
+            if 'error' in call:
+                raise call['error']
+            return call['data']
+        
+        try:
+            call['data'] = self._fetch(cache_key, url, params)
+            return call['data']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[cache_key]
+            call['done'].set()
+    
+    def _fetch(self, cache_key, url, params):
+        """Запросить данные у API и сохранить их в кеш"""
+        import requests
+        
+        endpoint = url.rsplit('/', 1)[-1]
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire()
+                if waited:
+                    self.stats.record_rate_limit_wait(waited)
+            started = time.perf_counter()
+            response = requests.get(url, params=params)
+            content = response.content
+            self.stats.record_upstream(
+                endpoint,
+                response.status_code,
+                time.perf_counter() - started,
+                len(content) if isinstance(content, bytes) else 0
+            )
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+            self.stats.record_retry(endpoint)
+            time.sleep(self._retry_delay(response, attempt))
         response.raise_for_status()
-        data = response.json()
+        data = self._compact_payload(cache_key, response.json())
         
         self._save_to_cache(cache_key, data)
-        
-        return self._format_forecast(data, days)
+        return data
+    
+    def _compact_payload(self, cache_key, data):
+        """Оставить в ответе API только поля, которые нужны форматированию"""
+        if cache_key.startswith("forecast_"):
+            return {
+                'city': {'name': data['city']['name'], 'country': data['city']['country']},
+                'list': [
+                    {
+                        'dt_txt': item['dt_txt'],
+                        'main': {'temp': item['main']['temp']},
+                        'weather': [{'description': item['weather'][0]['description']}]
+                    }
+                    for item in data['list']
+                ]
+            }
+        return {
+            'name': data['name'],
+            'sys': {'country': data['sys']['country']},
+            'main': {
+                key: data['main'][key]
+                for key in ('temp', 'feels_like', 'humidity', 'pressure')
+            },
+            'weather': [{'description': data['weather'][0]['description']}],
+            'wind': {key: value for key, value in data['wind'].items() if key in ('speed', 'deg')}
+        }
     
-    def _get_from_cache(self, key):
-        """Получить данные из кеша"""
-        cache_file = self.cache_dir / f"{hash(key)}.json"
-        if cache_file.exists():
+    def _retry_delay(self, response, attempt):
+        """Пауза перед повтором после 429: Retry-After или экспоненциальная"""
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, TypeError, ValueError):
+            return 2 ** attempt
+    
+    def _refresh_in_background(self, cache_key, url, params):
+        """Обновить запись кеша в отдельном потоке (не более одного на ключ)"""
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+        
+        def refresh():
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Проверяем, не устарели ли данные (кеш на 10 минут)
-                    cache_time = datetime.fromisoformat(data['_cached_at'])
-                    if datetime.now() - cache_time < timedelta(minutes=10):
-                        return data['data']
-            except (json.JSONDecodeError, KeyError):
-                # Если файл поврежден, игнорируем кеш
+                self._fetch(cache_key, url, params)
+            except Exception:
+                # Устаревшая запись остается в кеше до следующей попытки
                 pass
-        return None
+            finally:
+                with self._lock:
+                    self._refreshing.discard(cache_key)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    def _convert_forecast_to_imperial(self, data):
+        """Перевести метрический прогноз в имперские единицы без повторного запроса"""
+        converted = []
+        for item in data['list']:
+            item = dict(item)
+            item['main'] = {
+                key: value * 9 / 5 + 32 if key in TEMPERATURE_FIELDS else value
+                for key, value in item['main'].items()
+            }
+            if 'wind' in item:
+                item['wind'] = {
+                    key: value * MPS_TO_MPH if key in WIND_SPEED_FIELDS else value
+                    for key, value in item['wind'].items()
+                }
+            converted.append(item)
+        return dict(data, list=converted)
+    
+    def _cache_file(self, key):
+        """Путь к файлу кеша; имя не зависит от PYTHONHASHSEED, в отличие от hash()"""
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.owc"
+    
+    def _read_cache(self, key):
+        """Получить данные из кеша вместе со временем их сохранения"""
+        return self._lookup_cache(key)[0]
+    
+    def _lookup_cache(self, key):
+        """Найти запись в кеше: (данные и время сохранения или None, уровень кеша)"""
+        if self.memory_cache_size:
+            with self._lock:
+                entry = self._memory_cache.get(key)
+                if entry is not None:
+                    self._memory_cache.move_to_end(key)
+                    return entry, "memory"
+        if self.cache_dir is None:
+            return None, None
+        try:
+            with open(self._cache_file(key), 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None, None
+        if not raw.startswith(CACHE_FORMAT):
+            return None, None
+        try:
+            entry = json.loads(zlib.decompress(raw[len(CACHE_FORMAT):]))
+            entry = entry['d'], datetime.fromtimestamp(entry['t'])
+        except (zlib.error, ValueError, KeyError):
+            # Если файл поврежден, игнорируем кеш
+            return None, None
+        self._remember(key, entry)
+        return entry, "disk"
     
     def _save_to_cache(self, key, data):
-        """Сохранить данные в кеш"""
-        cache_file = self.cache_dir / f"{hash(key)}.json"
-        cache_data = {
-            '_cached_at': datetime.now().isoformat(),
-            'data': data
-        }
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        """Сохранить данные в кеш: компактный JSON, сжатый zlib, с заголовком версии"""
+        self._remember(key, (data, datetime.now()))
+        if self.cache_dir is None:
+            return
+        cache_file = self._cache_file(key)
+        payload = json.dumps({'t': time.time(), 'd': data}, ensure_ascii=False, separators=(',', ':'))
+        # Пишем во временный файл и подменяем: фоновое обновление не должно
+        # оставлять читателям наполовину записанный файл
+        tmp_file = cache_file.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(CACHE_FORMAT + zlib.compress(payload.encode('utf-8')))
+        os.replace(tmp_file, cache_file)
+    
+    def _remember(self, key, entry):
+        """Положить запись в кеш в памяти, вытесняя самую давнюю"""
+        if not self.memory_cache_size:
+            return
+        with self._lock:
+            self._memory_cache[key] = entry
+            self._memory_cache.move_to_end(key)
+            if len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
     
     def _format_current_weather(self, data):
         """Форматирование текущей погоды в читаемый вид"""
@@ -118,13 +383,14 @@ class OpenWeatherClient:
             
         return weather_info
     
-    def _format_forecast(self, data, days):
+    def _format_forecast(self, data, days, units="metric"):
         """Форматирование прогноза погоды"""
         forecasts = []
+        symbol = TEMPERATURE_SYMBOLS[units]
         
         # Группируем по дням
         daily_forecasts = {}
-        for item in data['list'][:days * 8]:
+        for item in data['list'][:days * FORECASTS_PER_DAY]:
             date = item['dt_txt'].split()[0]  # Берем только дату
             if date not in daily_forecasts:
                 daily_forecasts[date] = []
@@ -145,7 +411,7 @@ class OpenWeatherClient:
             
             forecasts.append({
                 'дата': date,
-                'средняя температура': f"{round(avg_temp, 1)}°C",
+                'средняя температура': f"{round(avg_temp, 1)}{symbol}",
                 'погода': most_common_weather.capitalize(),
                 'количество прогнозов': len(items)
             })
@@ -175,89 +441,154 @@ def main():
   get-weather "New York" --api-key ваш_ключ
   get-weather London --forecast 3 --units metric
   get-weather Tokyo --forecast 2 --units imperial
+  get-weather --bulk cities.txt --format csv
+  cat cities.txt | get-weather --bulk - --forecast 3
+  get-weather --bulk cities.txt --rate-limit 60 --rate-limit-file /tmp/owm.limit
         """
     )
     
-    parser.add_argument('city', help='Название города (например: "Moscow")')
+    parser.add_argument('city', nargs='?', help='Название города (например: "Moscow")')
     parser.add_argument('--country', help='Код страны (например: RU, US, GB)')
     parser.add_argument('--api-key', help='API ключ OpenWeather. Можно также установить через OPENWEATHER_API_KEY')
     parser.add_argument('--forecast', type=int, help='Прогноз на N дней (от 1 до 5)')
     parser.add_argument('--units', choices=['metric', 'imperial'], default='metric',
                        help='Единицы измерения: metric (метрические) или imperial (имперские)')
     parser.add_argument('--no-cache', action='store_true', help='Не использовать кеширование')
+    parser.add_argument('--bulk', metavar='FILE',
+                       help='Файл со списком городов, по одному в строке ("Город" или "Город,КОД"); "-" - stdin')
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson',
+                       help='Формат вывода в пакетном режиме')
+    parser.add_argument('--workers', type=int, default=8,
+                       help='Число одновременных запросов в пакетном режиме')
+    parser.add_argument('--rate-limit', type=int, metavar='CALLS',
+                       help='Не больше CALLS запросов к API в минуту')
+    parser.add_argument('--burst', type=int, default=10,
+                       help='Сколько запросов можно сделать подряд без ожидания')
+    parser.add_argument('--rate-limit-file', metavar='PATH',
+                       help='Файл для общего лимита между процессами (только POSIX)')
     
     args = parser.parse_args()
+    if not args.city and not args.bulk:
+        parser.error('укажите город или --bulk FILE')
     
     try:
-        client = OpenWeatherClient(api_key=args.api_key)
-        
-        if args.no_cache:
-            client.cache_dir = None  # Отключаем кеширование
+        # Запущенный get-weather-daemon отвечает из общего кеша в памяти;
+        # явный API ключ, --no-cache или свой лимит запросов (--rate-limit,
+        # --rate-limit-file) означают работу без него: у демона свой лимитер
+        client = None
+        if not (args.no_cache or args.api_key or args.rate_limit or args.rate_limit_file):
+            from . import daemon
+            client = daemon.connect()
         
-        if args.forecast:
-            result = client.get_forecast(
-                city=args.city,
-                country=args.country,
-                units=args.units,
-                days=args.forecast
-            )
-            
-            print(f"\n{'='*50}")
-            print(f"Прогноз погоды для {result['город']}, {result['страна']}")
-            print(f"На {args.forecast} дней:")
-            print('='*50)
-            
-            for forecast in result['прогнозы']:
-                print(f"\n📅 {forecast['дата']}:")
-                print(f"   🌡  Температура: {forecast['средняя температура']}")
-                print(f"   ☁️  Погода: {forecast['погода']}")
-                print(f"   📊 Прогнозов в день: {forecast['количество прогнозов']}")
-                
-        else:
-            result = client.get_current_weather(
-                city=args.city,
-                country=args.country,
-                units=args.units
-            )
+        if client is None:
+            client = OpenWeatherClient(api_key=args.api_key)
             
-            print(f"\n{'='*50}")
-            print(f"Текущая погода в {result['город']}, {result['страна']}:")
-            print('='*50)
+            if args.no_cache:
+                client.cache_dir = None  # Отключаем кеширование
             
-            for key, value in result.items():
-                if key not in ['город', 'страна']:
-                    # Иконки для разных параметров погоды
-                    icons = {
-                        'температура': '🌡',
-                        'ощущается': '🤔',
-                        'влажность': '💧',
-                        'давление': '📊',
-                        'погода': '☁️',
-                        'ветер': '💨',
-                        'направление ветра': '🧭'
-                    }
-                    icon = icons.get(key, '•')
-                    print(f"   {icon} {key.replace('_', ' ').title()}: {value}")
-            
-        print(f"\n{'='*50}")
-        print("Данные предоставлены OpenWeather")
+            if args.rate_limit:
+                from .ratelimit import RateLimiter, FileRateLimiter
+                if args.rate_limit_file:
+                    client.rate_limiter = FileRateLimiter(args.rate_limit_file, args.rate_limit, args.burst)
+                else:
+                    client.rate_limiter = RateLimiter(args.rate_limit, args.burst)
+        
+        if args.bulk:
+            sys.exit(run_bulk(client, args))
+        
+        print_result(client, args)
         
     except ValueError as e:
         print(f"\n❌ Ошибка: {e}")
         sys.exit(1)
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 401:
+    except Exception as e:
+        # HTTPError проверяем по атрибуту response, чтобы не импортировать requests;
+        # у ошибок демона статус лежит прямо в status_code
+        status = getattr(e, 'status_code', None) or getattr(getattr(e, 'response', None), 'status_code', None)
+        if status == 401:
             print(f"\n❌ Ошибка авторизации: Неверный API ключ")
             print("   Получите ключ на: https://openweathermap.org/api")
-        elif e.response.status_code == 404:
+        elif status == 404:
             print(f"\n❌ Город не найден: {args.city}")
             print("   Проверьте правильность названия города и страны")
-        else:
+        elif status is not None:
             print(f"\n❌ Ошибка API: {e}")
+        else:
+            print(f"\n❌ Неожиданная ошибка: {e}")
         sys.exit(1)
-    except Exception as e:
-        print(f"\n❌ Неожиданная ошибка: {e}")
-        sys.exit(1)
+
+def print_result(client, args):
+    """Запросить погоду или прогноз и напечатать в читаемом виде"""
+    if args.forecast:
+        result = client.get_forecast(
+            city=args.city,
+            country=args.country,
+            units=args.units,
+            days=args.forecast
+        )
+        
+        print(f"\n{'='*50}")
+        print(f"Прогноз погоды для {result['город']}, {result['страна']}")
+        print(f"На {args.forecast} дней:")
+        print('='*50)
+        
+        for forecast in result['прогнозы']:
+            print(f"\n📅 {forecast['дата']}:")
+            print(f"   🌡  Температура: {forecast['средняя температура']}")
+            print(f"   ☁️  Погода: {forecast['погода']}")
+            print(f"   📊 Прогнозов в день: {forecast['количество прогнозов']}")
+            
+    else:
+        result = client.get_current_weather(
+            city=args.city,
+            country=args.country,
+            units=args.units
+        )
+        
+        print(f"\n{'='*50}")
+        print(f"Текущая погода в {result['город']}, {result['страна']}:")
+        print('='*50)
+        
+        for key, value in result.items():
+            if key not in ['город', 'страна']:
+                # Иконки для разных параметров погоды
+                icons = {
+                    'температура': '🌡',
+                    'ощущается': '🤔',
+                    'влажность': '💧',
+                    'давление': '📊',
+                    'погода': '☁️',
+                    'ветер': '💨',
+                    'направление ветра': '🧭'
+                }
+                icon = icons.get(key, '•')
+                print(f"   {icon} {key.replace('_', ' ').title()}: {value}")
+        
+    print(f"\n{'='*50}")
+    print("Данные предоставлены OpenWeather")
+
+def run_bulk(client, args):
+    """Пакетный режим: города из файла или stdin, результаты потоком в stdout"""
+    from . import bulk
+    
+    stream = sys.stdin if args.bulk == '-' else open(args.bulk, encoding='utf-8')
+    try:
+        records = bulk.fetch_all(
+            client,
+            bulk.read_cities(stream),
+            workers=args.workers,
+            forecast=args.forecast,
+            units=args.units
+        )
+        if args.format == 'csv':
+            errors = bulk.write_csv(records, sys.stdout, forecast=args.forecast)
+        else:
+            errors = bulk.write_ndjson(records, sys.stdout)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    
+    return 1 if errors else 0
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
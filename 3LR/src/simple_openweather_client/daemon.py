@@ -0,0 +1,212 @@
+"""Локальный демон get-weather-daemon с общим кешем для всех вызовов get-weather
+
+Демон держит один OpenWeatherClient с кешем в памяти, объединяет
+одинаковые запросы к API и ограничивает их частоту. CLI-клиенты
+общаются с ним через Unix-сокет строками JSON:
+
+    -> {"method": "current", "params": {"city": "Moscow", "country": "RU"}}
+    <- {"ok": true, "result": {...}}
+    <- {"ok": false, "error": "...", "status": 404, "type": "http"}
+"""
+import json
+import os
+import socket
+import socketserver
+import sys
+from pathlib import Path
+
+SOCKET_ENV = "OPENWEATHER_DAEMON_SOCKET"
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 60
+
+# На платформах без Unix-сокетов модуль импортируется, но main() сразу завершится
+_UnixStreamServer = getattr(socketserver, "UnixStreamServer", socketserver.TCPServer)
+
+
+def socket_path():
+    """Путь к сокету демона: OPENWEATHER_DAEMON_SOCKET или файл в каталоге кеша"""
+    return os.getenv(SOCKET_ENV) or str(Path.home() / ".openweather_cache" / "daemon.sock")
+
+
+class DaemonError(Exception):
+    """Ошибка, которую вернул демон; status_code - HTTP статус ответа API, если был"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class DaemonClient:
+    """Клиент демона с тем же интерфейсом, что у OpenWeatherClient"""
+
+    def __init__(self, path=None):
+        self.path = path or socket_path()
+
+    def get_current_weather(self, city, country=None, units="metric"):
+        return self.call("current", city=city, country=country, units=units)
+
+    def get_forecast(self, city, country=None, units="metric", days=1):
+        return self.call("forecast", city=city, country=country, units=units, days=days)
+
+    def stats(self, prometheus=False):
+        """Статистика клиента демона: словарь или текст в формате Prometheus"""
+        return self.call("metrics" if prometheus else "stats")
+
+    def call(self, method, **params):
+        """Выполнить запрос к демону. OSError - демон недоступен"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(self.path)
+            sock.settimeout(REQUEST_TIMEOUT)
+            request = {"method": method, "params": params}
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        if not line:
+            raise ConnectionError("Демон закрыл соединение без ответа")
+
+        response = json.loads(line)
+        if response["ok"]:
+            return response["result"]
+        if response.get("type") == "value":
+            raise ValueError(response["error"])
+        raise DaemonError(response["error"], response.get("status"))
+
+
+def connect(path=None):
+    """Клиент демона, если он запущен, иначе None"""
+    path = path or socket_path()
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    client = DaemonClient(path)
+    try:
+        client.call("ping")
+    except (OSError, ValueError):
+        return None
+    return client
+
+
+class WeatherDaemon(socketserver.ThreadingMixIn, _UnixStreamServer):
+    """Сервер на Unix-сокете, отвечающий на запросы через общий OpenWeatherClient"""
+
+    daemon_threads = True
+
+    def __init__(self, client, path=None):
+        self.client = client
+        self.path = path or socket_path()
+        if os.path.exists(self.path):
+            # Сокет от предыдущего запуска: если на нем никто не отвечает - удаляем
+            if connect(self.path) is not None:
+                raise RuntimeError(f"Демон уже запущен: {self.path}")
+            os.unlink(self.path)
+        super().__init__(self.path, _RequestHandler)
+        os.chmod(self.path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def dispatch(self, request):
+        """Выполнить один запрос и вернуть словарь ответа"""
+        method = request.get("method")
+        params = request.get("params") or {}
+        try:
+            if method == "ping":
+                result = "pong"
+            elif method == "current":
+                result = self.client.get_current_weather(**params)
+            elif method == "forecast":
+                result = self.client.get_forecast(**params)
+            elif method == "stats":
+                result = self.client.stats.snapshot()
+            elif method == "metrics":
+                result = self.client.stats.to_prometheus()
+            else:
+                return {"ok": False, "error": f"Неизвестный метод: {method}", "type": "value"}
+            return {"ok": True, "result": result}
+        except (ValueError, TypeError) as e:
+            return {"ok": False, "error": str(e), "type": "value"}
+        except Exception as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            message = f"HTTP {status}" if status is not None else f"{type(e).__name__}: {e}"
+            return {"ok": False, "error": message, "status": status, "type": "http" if status else "error"}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except ValueError:
+                response = {"ok": False, "error": "Некорректный JSON", "type": "value"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+def main():
+    """Запуск демона: get-weather-daemon"""
+    import argparse
+    from datetime import timedelta
+    from .client import OpenWeatherClient
+    from .ratelimit import RateLimiter
+
+    parser = argparse.ArgumentParser(description="Локальный кеширующий демон для get-weather")
+    parser.add_argument("--socket", help=f"Путь к Unix-сокету (по умолчанию {socket_path()})")
+    parser.add_argument("--api-key", help="API ключ OpenWeather. Можно также установить через OPENWEATHER_API_KEY")
+    parser.add_argument("--rate-limit", type=int, default=60, metavar="CALLS",
+                        help="Не больше CALLS запросов к API в минуту")
+    parser.add_argument("--burst", type=int, default=10,
+                        help="Сколько запросов можно сделать подряд без ожидания")
+    parser.add_argument("--stale-minutes", type=int, default=10,
+                        help="Сколько минут после устаревания отдавать запись, обновляя ее в фоне")
+    parser.add_argument("--refresh-ahead", type=int, default=0, metavar="N",
+                        help="Держать свежими данные для N самых популярных запросов")
+    parser.add_argument("--memory-cache-size", type=int, default=10000,
+                        help="Сколько записей держать в памяти")
+    parser.add_argument("--stats", choices=["json", "prometheus"],
+                        help="Не запускать демон, а вывести статистику уже запущенного")
+    args = parser.parse_args()
+
+    if args.stats:
+        client = connect(args.socket)
+        if client is None:
+            print("❌ Демон не запущен")
+            sys.exit(1)
+        if args.stats == "prometheus":
+            print(client.stats(prometheus=True), end="")
+        else:
+            print(json.dumps(client.stats(), ensure_ascii=False, indent=2))
+        return
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("❌ Unix-сокеты не поддерживаются на этой платформе")
+        sys.exit(1)
+
+    try:
+        client = OpenWeatherClient(
+            api_key=args.api_key,
+            stale_while_revalidate=timedelta(minutes=args.stale_minutes),
+            rate_limiter=RateLimiter(args.rate_limit, args.burst),
+            memory_cache_size=args.memory_cache_size
+        )
+        server = WeatherDaemon(client, args.socket)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Ошибка: {e}")
+        sys.exit(1)
+
+    if args.refresh_ahead:
+        client.start_refresh_ahead(top_n=args.refresh_ahead)
+
+    print(f"get-weather-daemon слушает {server.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from .client import OpenWeatherClient
+from .ratelimit import RateLimiter, FileRateLimiter
+from .metrics import ClientStats
 
 __version__ = "0.1.0"
 __author__ = "Radimir"
-__all__ = ["OpenWeatherClient"]
\ No newline at end of file
+__all__ = ["OpenWeatherClient", "RateLimiter", "FileRateLimiter", "ClientStats"]
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""Статистика работы OpenWeatherClient: кеш, запросы к API, повторы, ожидание лимита"""
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ClientStats:
+    """Потокобезопасные счетчики клиента
+
+    Можно подключить хуки (add_hook): каждый получает имя события и его
+    поля, например ("upstream", {"endpoint": "weather", "status": 200, ...}),
+    и может пересылать их во внешнюю систему метрик.
+    """
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self._hooks = []
+        self.latency_buckets = tuple(latency_buckets)
+        self.reset()
+
+    def reset(self):
+        """Обнулить все счетчики"""
+        with self._lock:
+            self.cache = Counter()  # (уровень кеша, результат) -> количество
+            self.upstream = Counter()  # (endpoint, HTTP статус) -> количество
+            self.latency_counts = [0] * (len(self.latency_buckets) + 1)
+            self.latency_sum = 0.0
+            self.bytes_received = 0
+            self.retries = 0
+            self.rate_limit_waits = 0
+            self.rate_limit_wait_seconds = 0.0
+
+    def add_hook(self, hook):
+        """Подписать hook(event, fields) на все события"""
+        self._hooks.append(hook)
+
+    def record_cache(self, tier, result):
+        """Обращение к кешу: tier - memory/disk, result - hit/miss/stale/expired"""
+        with self._lock:
+            self.cache[tier, result] += 1
+        self._emit("cache", tier=tier, result=result)
+
+    def record_upstream(self, endpoint, status, seconds, size):
+        """Запрос к API: статус ответа, длительность и размер тела"""
+        with self._lock:
+            self.upstream[endpoint, status] += 1
+            self.latency_counts[bisect_left(self.latency_buckets, seconds)] += 1
+            self.latency_sum += seconds
+            self.bytes_received += size
+        self._emit("upstream", endpoint=endpoint, status=status, seconds=seconds, size=size)
+
+    def record_retry(self, endpoint):
+        """Повтор запроса после 429"""
+        with self._lock:
+            self.retries += 1
+        self._emit("retry", endpoint=endpoint)
+
+    def record_rate_limit_wait(self, seconds):
+        """Ожидание токена в ограничителе частоты"""
+        with self._lock:
+            self.rate_limit_waits += 1
+            self.rate_limit_wait_seconds += seconds
+        self._emit("rate_limit_wait", seconds=seconds)
+
+    def snapshot(self):
+        """Текущие значения счетчиков в виде словаря (можно сериализовать в JSON)"""
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.latency_buckets + (float("inf"),), self.latency_counts):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            return {
+                "cache": {f"{tier}.{result}": count for (tier, result), count in sorted(self.cache.items())},
+                "upstream": {f"{endpoint}.{status}": count for (endpoint, status), count in sorted(self.upstream.items())},
+                "upstream_latency": {"buckets": buckets, "sum": self.latency_sum, "count": cumulative},
+                "bytes_received": self.bytes_received,
+                "retries": self.retries,
+                "rate_limit_waits": self.rate_limit_waits,
+                "rate_limit_wait_seconds": self.rate_limit_wait_seconds,
+            }
+
+    def to_prometheus(self, prefix="openweather"):
+        """Счетчики в текстовом формате Prometheus"""
+        snapshot = self.snapshot()
+        with self._lock:
+            cache = sorted(self.cache.items())
+            upstream = sorted(self.upstream.items())
+        lines = [
+            f"# HELP {prefix}_cache_lookups_total Обращения к кешу по уровню и результату",
+            f"# TYPE {prefix}_cache_lookups_total counter",
+        ]
+        lines += [
+            f'{prefix}_cache_lookups_total{{tier="{tier}",result="{result}"}} {count}'
+            for (tier, result), count in cache
+        ]
+        lines += [
+            f"# HELP {prefix}_upstream_requests_total Запросы к API по endpoint и HTTP статусу",
+            f"# TYPE {prefix}_upstream_requests_total counter",
+        ]
+        lines += [
+            f'{prefix}_upstream_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}'
+            for (endpoint, status), count in upstream
+        ]
+        latency = snapshot["upstream_latency"]
+        lines += [
+            f"# HELP {prefix}_upstream_latency_seconds Длительность запросов к API",
+            f"# TYPE {prefix}_upstream_latency_seconds histogram",
+        ]
+        lines += [
+            f'{prefix}_upstream_latency_seconds_bucket{{le="{bound}"}} {count}'
+            for bound, count in latency["buckets"].items()
+        ]
+        lines += [
+            f"{prefix}_upstream_latency_seconds_sum {latency['sum']}",
+            f"{prefix}_upstream_latency_seconds_count {latency['count']}",
+        ]
+        for name, value, kind, help_text in (
+            ("upstream_bytes_total", snapshot["bytes_received"], "counter", "Получено байт от API"),
+            ("retries_total", snapshot["retries"], "counter", "Повторы запросов после 429"),
+            ("rate_limit_waits_total", snapshot["rate_limit_waits"], "counter", "Запросы, ждавшие токен"),
+            ("rate_limit_wait_seconds_total", snapshot["rate_limit_wait_seconds"], "counter",
+             "Суммарное ожидание токена"),
+        ):
+            lines += [
+                f"# HELP {prefix}_{name} {help_text}",
+                f"# TYPE {prefix}_{name} {kind}",
+                f"{prefix}_{name} {value}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def _emit(self, event, **fields):
+        for hook in self._hooks:
+            hook(event, fields)
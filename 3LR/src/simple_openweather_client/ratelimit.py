@@ -0,0 +1,85 @@
+"""Ограничение частоты запросов к OpenWeather (token bucket)"""
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket, общий для всех потоков процесса
+
+    Токены пополняются со скоростью calls_per_minute в минуту, в запасе
+    может быть не больше burst. Каждый вызов acquire() резервирует токен
+    и при необходимости ждет, пока он появится.
+    """
+
+    def __init__(self, calls_per_minute=60, burst=10):
+        if calls_per_minute <= 0 or burst < 1:
+            raise ValueError("Лимит запросов и burst должны быть положительными")
+        self.rate = calls_per_minute / 60.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Дождаться разрешения на запрос. Возвращает время ожидания в секундах"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = _reserve(self._tokens, now - self._updated, self.rate, self.burst)
+            self._updated = now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class FileRateLimiter:
+    """Token bucket, общий для нескольких процессов через файл с блокировкой
+
+    Состояние корзины хранится в самом файле, доступ к нему сериализуется
+    через flock, поэтому все процессы с одним path делят общий лимит.
+    Работает только на POSIX-системах.
+    """
+
+    def __init__(self, path, calls_per_minute=60, burst=10):
+        if calls_per_minute <= 0 or burst < 1:
+            raise ValueError("Лимит запросов и burst должны быть положительными")
+        self.path = str(path)
+        self.rate = calls_per_minute / 60.0
+        self.burst = burst
+        # Внутри процесса потоки ждут на обычной блокировке, а не на flock
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Дождаться разрешения на запрос. Возвращает время ожидания в секундах"""
+        import fcntl
+
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                now = time.time()
+                try:
+                    tokens, updated = map(float, f.read().split())
+                except ValueError:
+                    # Новый или поврежденный файл - начинаем с полной корзины
+                    tokens, updated = float(self.burst), now
+                tokens, wait = _reserve(tokens, max(now - updated, 0.0), self.rate, self.burst)
+                f.seek(0)
+                f.truncate()
+                f.write(f"{tokens!r} {now!r}")
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def _reserve(tokens, elapsed, rate, burst):
+    """Пополнить корзину за elapsed секунд и забрать один токен
+
+    Токенов может стать меньше нуля - это очередь уже зарезервированных
+    запросов; возвращается, сколько ждать до своего токена.
+    """
+    tokens = min(float(burst), tokens + elapsed * rate) - 1
+    wait = -tokens / rate if tokens < 0 else 0.0
+    return tokens, wait
@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import Mock
+import io
+import json
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from simple_openweather_client import bulk
+from simple_openweather_client.daemon import DaemonError
+
+class TestBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.client = Mock()
+        self.client.get_current_weather.side_effect = self.fake_current_weather
+
+    @staticmethod
+    def fake_current_weather(city, country=None, units="metric"):
+        if city == "Atlantis":
+            error = Exception("404 Client Error for url: ...&appid=secret")
+            error.response = Mock(status_code=404)
+            raise error
+        return {'город': city, 'страна': country or "", 'температура': "10.0°C"}
+
+    def test_read_cities(self):
+        """Тест разбора списка городов"""
+        stream = io.StringIO("Moscow,RU\n\n# комментарий\n  London \n")
+
+        self.assertEqual(list(bulk.read_cities(stream)), [("Moscow", "RU"), ("London", None)])
+
+    def test_ndjson_output(self):
+        """Тест потокового вывода NDJSON с ошибками по отдельным городам"""
+        cities = iter([("Moscow", "RU"), ("Atlantis", None), ("London", None)])
+        out = io.StringIO()
+
+        errors = bulk.write_ndjson(bulk.fetch_all(self.client, cities, workers=2), out)
+        records = {r['запрос']: r for r in map(json.loads, out.getvalue().splitlines())}
+
+        self.assertEqual(errors, 1)
+        self.assertEqual(records["Moscow,RU"]['результат']['город'], "Moscow")
+        self.assertEqual(records["Atlantis"]['ошибка'], "Город не найден")
+        self.assertNotIn("secret", out.getvalue())
+
+    def test_daemon_error_messages(self):
+        """Тест сообщений об ошибках, пришедших от демона"""
+        self.assertEqual(bulk._error_message(DaemonError("404 Client Error", status_code=404)), "Город не найден")
+        self.assertEqual(bulk._error_message(DaemonError("401 Client Error", status_code=401)), "Неверный API ключ")
+        self.assertEqual(bulk._error_message(DaemonError("Демон недоступен")), "Демон недоступен")
+
+    def test_csv_output(self):
+        """Тест вывода в CSV"""
+        out = io.StringIO()
+
+        bulk.write_csv(bulk.fetch_all(self.client, iter([("Moscow", "RU")])), out)
+        lines = out.getvalue().splitlines()
+
+        self.assertEqual(lines[0].split(',')[:3], ['запрос', 'город', 'страна'])
+        self.assertTrue(lines[1].startswith('"Moscow,RU",Moscow,RU,10.0°C'))
+
+if __name__ == '__main__':
+    unittest.main()
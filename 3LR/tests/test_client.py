@@ -2,15 +2,38 @@ import unittest
 from unittest.mock import patch, Mock
 import os
 import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from simple_openweather_client import OpenWeatherClient
 
+def make_forecast_payload(days=5):
+    """Ответ API с прогнозом на несколько дней (8 записей в день)"""
+    items = []
+    for day in range(days):
+        for hour in range(0, 24, 3):
+            items.append({
+                "dt_txt": f"2024-01-{day + 1:02d} {hour:02d}:00:00",
+                "main": {"temp": 10.0 + day, "feels_like": 8.0 + day},
+                "weather": [{"description": "облачно"}],
+                "wind": {"speed": 2.0}
+            })
+    return {"city": {"name": "Moscow", "country": "RU"}, "list": items}
+
 class TestOpenWeatherClient(unittest.TestCase):
     
     def setUp(self):
         self.api_key = "test_api_key"
         self.client = OpenWeatherClient(api_key=self.api_key)
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.client.cache_dir = Path(self.cache_dir.name)
+    
+    def tearDown(self):
+        self.cache_dir.cleanup()
     
     @patch('simple_openweather_client.client.requests.get')
     def test_get_current_weather_success(self, mock_get):
@@ -81,5 +104,211 @@ class TestOpenWeatherClient(unittest.TestCase):
         
         self.assertIn("Допустимое количество дней", str(context.exception))
 
+    @patch('simple_openweather_client.client.requests.get')
+    def test_forecast_reuses_cached_longer_forecast(self, mock_get):
+        """Тест: короткий прогноз берется из закешированного пятидневного"""
+        mock_response = Mock()
+        mock_response.json.return_value = make_forecast_payload()
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        
+        full = self.client.get_forecast("Moscow", "RU", days=5)
+        short = self.client.get_forecast("Moscow", "RU", days=2)
+        
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args.kwargs['params']['cnt'], 40)
+        self.assertEqual(len(full['прогнозы']), 5)
+        self.assertEqual(len(short['прогнозы']), 2)
+        self.assertEqual(short['прогнозы'][1]['средняя температура'], "11.0°C")
+    
+    @patch('simple_openweather_client.client.requests.get')
+    def test_forecast_imperial_converted_locally(self, mock_get):
+        """Тест: имперские единицы пересчитываются без повторного запроса"""
+        mock_response = Mock()
+        mock_response.json.return_value = make_forecast_payload()
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        
+        self.client.get_forecast("Moscow", days=1, units="metric")
+        result = self.client.get_forecast("Moscow", days=1, units="imperial")
+        
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args.kwargs['params']['units'], "metric")
+        self.assertEqual(result['прогнозы'][0]['средняя температура'], "50.0°F")
+
+    @patch('simple_openweather_client.client.requests.get')
+    def test_stale_entry_served_and_refreshed_in_background(self, mock_get):
+        """Тест: устаревшая запись отдается сразу и обновляется в фоне"""
+        def make_response(temp):
+            response = Mock()
+            response.raise_for_status.return_value = None
+            response.json.return_value = {
+                "name": "Moscow",
+                "sys": {"country": "RU"},
+                "main": {"temp": temp, "feels_like": temp, "humidity": 65, "pressure": 1013},
+                "weather": [{"description": "ясно"}],
+                "wind": {"speed": 3.5}
+            }
+            return response
+        mock_get.side_effect = [make_response(10.0), make_response(20.0)]
+        
+        client = OpenWeatherClient(api_key=self.api_key, stale_while_revalidate=timedelta(minutes=5))
+        client.cache_dir = self.client.cache_dir
+        client.cache_ttl = timedelta(0)
+        
+        first = client.get_current_weather("Moscow")
+        stale = client.get_current_weather("Moscow")
+        self.assertEqual(first['температура'], "10.0°C")
+        self.assertEqual(stale['температура'], "10.0°C")
+        
+        deadline = time.monotonic() + 5
+        while (mock_get.call_count < 2 or client._refreshing) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        self.assertEqual(mock_get.call_count, 2)
+        data, _ = client._read_cache("current_Moscow_metric")
+        self.assertEqual(data['main']['temp'], 20.0)
+
+    def test_refresh_ahead_forgets_cold_keys(self):
+        """Тест: счетчики refresh-ahead затухают, и забытые ключи не копятся"""
+        self.client._refresh_ahead_stop = threading.Event()
+        for key, hits in (("hot", 8), ("cold", 1)):
+            self.client._key_hits[key] = hits
+            self.client._requests_by_key[key] = ("url", {"q": key})
+        
+        with patch.object(self.client, '_read_cache', return_value=None), \
+                patch.object(self.client, '_fetch') as mock_fetch:
+            self.client._refresh_hottest(top_n=2, interval=60)
+        
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(dict(self.client._key_hits), {"hot": 4})
+        self.assertEqual(set(self.client._requests_by_key), {"hot"})
+
+    @patch('simple_openweather_client.client.time.sleep')
+    @patch('simple_openweather_client.client.requests.get')
+    def test_retry_after_429(self, mock_get, mock_sleep):
+        """Тест: после 429 запрос повторяется через Retry-After"""
+        throttled = Mock(status_code=429, headers={'Retry-After': '7'})
+        ok = Mock(status_code=200)
+        ok.raise_for_status.return_value = None
+        ok.json.return_value = make_forecast_payload()
+        mock_get.side_effect = [throttled, ok]
+        self.client.rate_limiter = Mock()
+        self.client.rate_limiter.acquire.return_value = 0.5
+        
+        result = self.client.get_forecast("Moscow", days=1)
+        
+        self.assertEqual(result['город'], "Moscow")
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(self.client.rate_limiter.acquire.call_count, 2)
+        mock_sleep.assert_called_once_with(7.0)
+        stats = self.client.stats.snapshot()
+        self.assertEqual(stats['retries'], 1)
+        self.assertEqual(stats['upstream'], {'forecast.200': 1, 'forecast.429': 1})
+        self.assertEqual(stats['rate_limit_wait_seconds'], 1.0)
+
+    @patch('simple_openweather_client.client.requests.get')
+    def test_cache_stores_compact_payload(self, mock_get):
+        """Тест: в кеш попадают только нужные поля в сжатом виде с заголовком версии"""
+        payload = make_forecast_payload()
+        for item in payload['list']:
+            item['extra'] = {"pop": 0.2, "visibility": 10000}
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = payload
+        mock_get.return_value = mock_response
+        
+        self.client.get_forecast("Moscow", days=1)
+        cache_file = self.client._cache_file("forecast_Moscow")
+        data, _ = self.client._read_cache("forecast_Moscow")
+        
+        self.assertTrue(cache_file.read_bytes().startswith(b"OWC"))
+        self.assertNotIn('extra', data['list'][0])
+        self.assertEqual(data['list'][0]['main'], {'temp': 10.0})
+        
+        cache_file.write_bytes(b"OWC\x00" + cache_file.read_bytes()[4:])
+        self.assertIsNone(self.client._read_cache("forecast_Moscow"))
+    
+    @patch('simple_openweather_client.client.requests.get')
+    def test_cache_disabled(self, mock_get):
+        """Тест: без каталога кеша каждый вызов идет в API"""
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = make_forecast_payload()
+        mock_get.return_value = mock_response
+        self.client.cache_dir = None
+        
+        self.client.get_forecast("Moscow", days=1)
+        self.client.get_forecast("Moscow", days=1)
+        
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('simple_openweather_client.client.requests.get')
+    def test_concurrent_misses_coalesced(self, mock_get):
+        """Тест: одновременные промахи по одному ключу дают один запрос к API"""
+        release = threading.Event()
+        def slow_get(url, params):
+            release.wait(5)
+            response = Mock(status_code=200)
+            response.json.return_value = make_forecast_payload()
+            return response
+        mock_get.side_effect = slow_get
+        results = []
+        
+        threads = [
+            threading.Thread(target=lambda: results.append(self.client.get_forecast("Moscow", days=1)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(results), 5)
+    
+    @patch('simple_openweather_client.client.requests.get')
+    def test_memory_cache_tier(self, mock_get):
+        """Тест: кеш в памяти отвечает без чтения файла и ограничен по размеру"""
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = make_forecast_payload()
+        mock_get.return_value = mock_response
+        self.client.memory_cache_size = 1
+        
+        self.client.get_forecast("Moscow", days=1)
+        self.client._cache_file("forecast_Moscow").unlink()
+        self.client.get_forecast("Moscow", days=2)
+        self.assertEqual(mock_get.call_count, 1)
+        
+        self.client.get_forecast("London", days=1)
+        self.assertEqual(list(self.client._memory_cache), ["forecast_London"])
+
+    @patch('simple_openweather_client.client.requests.get')
+    def test_stats_cache_tiers_and_hooks(self, mock_get):
+        """Тест: статистика считает попадания по уровням кеша и вызывает хуки"""
+        mock_response = Mock(status_code=200, content=b'{"payload": 1}')
+        mock_response.json.return_value = make_forecast_payload()
+        mock_get.return_value = mock_response
+        events = []
+        self.client.stats.add_hook(lambda event, fields: events.append(event))
+        self.client.memory_cache_size = 10
+        
+        self.client.get_forecast("Moscow", days=1)
+        self.client.get_forecast("Moscow", days=1)
+        self.client._memory_cache.clear()
+        self.client.get_forecast("Moscow", days=1)
+        stats = self.client.stats.snapshot()
+        
+        self.assertEqual(stats['cache'], {
+            'disk.hit': 1, 'disk.miss': 1, 'memory.hit': 1, 'memory.miss': 2
+        })
+        self.assertEqual(stats['bytes_received'], 14)
+        self.assertEqual(stats['upstream_latency']['count'], 1)
+        self.assertEqual(events.count('upstream'), 1)
+        
+        text = self.client.stats.to_prometheus()
+        self.assertIn('openweather_cache_lookups_total{tier="memory",result="hit"} 1', text)
+        self.assertIn('openweather_upstream_latency_seconds_bucket{le="+Inf"} 1', text)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
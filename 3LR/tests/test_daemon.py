@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import Mock, patch
+import os
+import socket
+import sys
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from simple_openweather_client import client as cli, daemon
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "нужны Unix-сокеты")
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'daemon.sock')
+        self.weather = Mock()
+        self.weather.get_current_weather.return_value = {'город': "Moscow", 'температура': "15.5°C"}
+        self.server = daemon.WeatherDaemon(self.weather, self.path)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_current_weather_through_socket(self):
+        """Тест: CLI-клиент получает погоду через демон"""
+        client = daemon.connect(self.path)
+
+        result = client.get_current_weather("Moscow", "RU")
+
+        self.assertEqual(result['температура'], "15.5°C")
+        self.weather.get_current_weather.assert_called_once_with(city="Moscow", country="RU", units="metric")
+
+    def test_errors_are_forwarded(self):
+        """Тест: ошибки API и валидации передаются клиенту"""
+        not_found = Exception("404")
+        not_found.response = Mock(status_code=404)
+        self.weather.get_current_weather.side_effect = not_found
+        self.weather.get_forecast.side_effect = ValueError("Допустимое количество дней: от 1 до 5")
+        client = daemon.DaemonClient(self.path)
+
+        with self.assertRaises(daemon.DaemonError) as context:
+            client.get_current_weather("Atlantis")
+        self.assertEqual(context.exception.status_code, 404)
+
+        with self.assertRaises(ValueError):
+            client.get_forecast("Moscow", days=9)
+
+    def test_stats(self):
+        """Тест: демон отдает статистику своего клиента"""
+        self.weather.stats.snapshot.return_value = {'retries': 0}
+        self.weather.stats.to_prometheus.return_value = "openweather_retries_total 0\n"
+        client = daemon.DaemonClient(self.path)
+
+        self.assertEqual(client.stats(), {'retries': 0})
+        self.assertEqual(client.stats(prometheus=True), "openweather_retries_total 0\n")
+
+    def test_connect_without_daemon(self):
+        """Тест: без запущенного демона connect() возвращает None"""
+        self.assertIsNone(daemon.connect(os.path.join(self.tmp.name, 'missing.sock')))
+
+    def test_rate_limit_bypasses_daemon(self):
+        """Тест: с --rate-limit CLI работает без демона, чтобы лимит применился"""
+        argv = ['get-weather', 'Moscow', '--rate-limit', '60']
+        with patch.object(sys, 'argv', argv), patch.dict(os.environ, OPENWEATHER_API_KEY="test_api_key"), \
+                patch.object(daemon, 'connect') as connect, patch.object(cli, 'print_result') as print_result:
+            cli.main()
+
+        connect.assert_not_called()
+        self.assertIsNotNone(print_result.call_args.args[0].rate_limiter)
+
+    def test_second_daemon_refused(self):
+        """Тест: второй демон на том же сокете не запускается"""
+        with self.assertRaises(RuntimeError):
+            daemon.WeatherDaemon(self.weather, self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from simple_openweather_client import RateLimiter, FileRateLimiter
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_burst_then_wait(self):
+        """Тест: burst запросов проходит сразу, следующий ждет токен"""
+        limiter = RateLimiter(calls_per_minute=600, burst=2)
+
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertEqual(limiter.acquire(), 0)
+        start = time.monotonic()
+        waited = limiter.acquire()
+
+        self.assertAlmostEqual(waited, 0.1, delta=0.02)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_shared_between_threads(self):
+        """Тест: потоки делят один лимит"""
+        limiter = RateLimiter(calls_per_minute=1200, burst=1)
+        waits = []
+
+        threads = [threading.Thread(target=lambda: waits.append(limiter.acquire())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertAlmostEqual(max(waits), 0.15, delta=0.03)
+
+    def test_invalid_limits(self):
+        """Тест валидации параметров"""
+        with self.assertRaises(ValueError):
+            RateLimiter(calls_per_minute=0)
+
+    @unittest.skipIf(os.name != 'posix', "flock доступен только на POSIX")
+    def test_file_limiter_shared_state(self):
+        """Тест: два лимитера с одним файлом делят корзину"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'limit')
+            first = FileRateLimiter(path, calls_per_minute=600, burst=1)
+            second = FileRateLimiter(path, calls_per_minute=600, burst=1)
+
+            self.assertEqual(first.acquire(), 0)
+            self.assertAlmostEqual(second.acquire(), 0.1, delta=0.02)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from simple_openweather_client import OpenWeatherClient
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+# Запускает CLI и сообщает, был ли загружен requests
+RUN_CLI = """
+import sys
+from simple_openweather_client.client import main
+sys.argv = ['get-weather'] + sys.argv[1:]
+try:
+    main()
+except SystemExit:
+    pass
+sys.stderr.write('REQUESTS_LOADED=%s' % ('requests' in sys.modules))
+"""
+
+class TestStartup(unittest.TestCase):
+
+    def run_cli(self, home, *args):
+        env = dict(os.environ, HOME=home, PYTHONPATH=SRC_DIR, OPENWEATHER_API_KEY="test_api_key")
+        result = subprocess.run(
+            [sys.executable, '-c', RUN_CLI] + list(args),
+            env=env, capture_output=True, text=True, timeout=30
+        )
+        return result.stdout, result.stderr
+
+    def test_help_does_not_import_requests(self):
+        """Тест: --help не загружает сетевой стек"""
+        with tempfile.TemporaryDirectory() as home:
+            stdout, stderr = self.run_cli(home, '--help')
+
+        self.assertIn('get-weather', stdout)
+        self.assertIn('REQUESTS_LOADED=False', stderr)
+
+    def test_cache_hit_does_not_import_requests(self):
+        """Тест: ответ из кеша не загружает сетевой стек"""
+        with tempfile.TemporaryDirectory() as home:
+            client = OpenWeatherClient(api_key="test_api_key")
+            client.cache_dir = Path(home) / ".openweather_cache"
+            client.cache_dir.mkdir()
+            client._save_to_cache("current_Moscow_metric", {
+                "name": "Moscow",
+                "sys": {"country": "RU"},
+                "main": {"temp": 15.5, "feels_like": 14.0, "humidity": 65, "pressure": 1013},
+                "weather": [{"description": "ясно"}],
+                "wind": {"speed": 3.5, "deg": 180}
+            })
+
+            stdout, stderr = self.run_cli(home, 'Moscow')
+
+        self.assertIn('15.5°C', stdout)
+        self.assertIn('REQUESTS_LOADED=False', stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,28 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import FastAPI, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import timezone
+from email.utils import format_datetime, formatdate
+from typing import List, Optional
+import asyncio
+import base64
+import json
+import time
+import async_crud
 import crud
 import schemas
-from database import get_db, init_db
+import profiling
+import term_io
+from database import AsyncSessionLocal, async_engine, close_async_db, get_async_db, init_async_db
+from term_cache import term_cache
+from term_index import term_index
 import uvicorn
 
-# Инициализация БД при старте приложения
-init_db()
+# Сколько ошибок отдельных строк возвращать в отчете импорта
+MAX_REPORTED_IMPORT_ERRORS = 100
+# Сколько терминов выгрузки читается за одно обращение к БД
+EXPORT_BATCH_SIZE = 1000
 
 app = FastAPI(
     title="Глоссарий терминов Python",
@@ -15,58 +30,350 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Учет SQL-запросов в профиле HTTP-запроса и журнал медленных запросов
+profiling.instrument_engine(async_engine.sync_engine)
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Число SQL-запросов, время в БД, сериализации и общее - в Server-Timing и /metrics"""
+    started = time.perf_counter()
+    profile = profiling.start_request()
+    response = await call_next(request)
+    total = time.perf_counter() - started
+    response.headers["Server-Timing"] = profile.server_timing(total)
+    route = request.scope.get("route")
+    profiling.metrics.observe(route.path if route else "unmatched", request.method, profile, total)
+    return response
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     """Вызывается при старте приложения"""
-    init_db()
+    await init_async_db()
     print("✅ База данных инициализирована")
+    async with AsyncSessionLocal() as db:
+        term_index.build(await async_crud.get_term_names(db))
+    print(f"✅ Индекс автодополнения построен: {len(term_index)} терминов")
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Вызывается при остановке приложения"""
+    await close_async_db()
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Добро пожаловать в глоссарий терминов Python!"}
 
-@app.get("/terms", response_model=List[schemas.TermResponse])
-def get_all_terms(db: Session = Depends(get_db)):
-    """Получить список всех терминов"""
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Гистограммы запросов этого воркера в формате Prometheus"""
+    return profiling.metrics.to_prometheus()
+
+def encode_cursor(order_by: str, after) -> str:
+    """Непрозрачный курсор следующей страницы: ключ сортировки и его последнее значение"""
+    raw = json.dumps({"o": order_by, "k": after}, ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str, order_by: str):
+    """Значение ключа из курсора; курсор должен относиться к той же сортировке
+
+    Для id ключ - целое число (bool не подходит), для term - строка.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if data["o"] != order_by:
+            raise ValueError
+        after = data["k"]
+        valid = isinstance(after, str) if order_by == "term" else type(after) is int
+        if not valid:
+            raise ValueError
+        return after
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+def parse_fields(fields: Optional[str]):
+    """Список запрошенных полей из параметра fields=term,category"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = set(names) - set(crud.TERM_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    return list(dict.fromkeys(names))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Есть ли etag среди значений заголовка If-None-Match"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+def glossary_validators(version: int, modified: int) -> dict:
+    """ETag и Last-Modified списка: меняются при любом изменении глоссария"""
+    return {"ETag": f'"g{version}"', "Last-Modified": formatdate(modified, usegmt=True)}
+
+def term_validators(term) -> dict:
+    """ETag и Last-Modified термина по его номеру правки и времени записи
+
+    Время входит в ETag, чтобы удаленный и созданный заново термин с тем же
+    id и номером правки не совпал со старым.
+    """
+    if term.updated_at is None:
+        return {"ETag": f'"{term.id}-{term.version}"'}
+    updated_at = term.updated_at.replace(tzinfo=timezone.utc)
+    stamp = int(updated_at.timestamp() * 1_000_000)
+    return {
+        "ETag": f'"{term.id}-{term.version}-{stamp:x}"',
+        "Last-Modified": format_datetime(updated_at, usegmt=True),
+    }
+
+@app.get("/terms", response_model=List[schemas.TermListItem], response_model_exclude_unset=True)
+async def get_all_terms(
+    limit: int = Query(100, ge=1, le=1000, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor предыдущей страницы"),
+    order_by: str = Query("id", pattern="^(id|term)$", description="Сортировка: id или term"),
+    fields: Optional[str] = Query(None, description="Поля через запятую, например term,category"),
+    category: Optional[str] = Query(None, description="Только термины этой категории"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Получить страницу терминов; курсор следующей страницы - в заголовке X-Next-Cursor
+
+    Если глоссарий не менялся с ETag из If-None-Match, отвечает 304 без чтения терминов.
+    """
+    after = decode_cursor(cursor, order_by) if cursor else None
+    selected = parse_fields(fields)
+    validators = glossary_validators(*await async_crud.get_glossary_version(db))
+    if etag_matches(if_none_match, validators["ETag"]):
+        return Response(status_code=304, headers=validators)
+
+    key = (limit, after, order_by, tuple(selected or ()), category)
+    page = term_cache.get_page(key)
+    # Страница другой версии глоссария устарела, даже если сброс кеша еще не дошел
+    if page is None or page[1]["ETag"] != validators["ETag"]:
+        generation = term_cache.generation
+        try:
+            # Версия и страница читаются разными запросами в автокоммите: запись между ними
+            # даст страницу новее ETag. Это безопасно - такой ETag при проверке уже не совпадет
+            terms, next_after = await async_crud.get_terms_page(
+                db, limit, after, order_by, selected, category
+            )
+        except Exception as e:
+            print(f"Ошибка при получении терминов: {e}")
+            raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+        headers = dict(validators)
+        if next_after is not None:
+            headers["X-Next-Cursor"] = encode_cursor(order_by, next_after)
+        with profiling.serialization():
+            page = (term_io.dumps_json(terms), headers)
+        term_cache.put_page(key, page, generation)
+    body, headers = page
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/categories", response_model=List[schemas.CategoryCount])
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
+    """Категории с числом терминов в каждой"""
+    return await async_crud.get_category_counts(db)
+
+@app.get("/terms/search", response_model=List[schemas.TermSearchResult])
+async def search_terms(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Слова для поиска"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Полнотекстовый поиск по названию, описанию и примеру; смещение следующей страницы - в X-Next-Offset"""
+    results, has_more = await async_crud.search_terms(db, q, limit, offset)
+    if has_more:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return results
+
+@app.get("/terms/autocomplete", response_model=List[str])
+async def autocomplete_terms(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Начало названия термина"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Названия терминов, начинающиеся с prefix (без учета регистра), из индекса в памяти
+
+    Индекс каждого воркера обновляется при его собственных записях. Термины,
+    измененные другими воркерами, приходят через журнал TERM_CACHE_CHANNEL:
+    по ним индекс сверяется с БД, после импорта строится заново.
+    """
+    names, everything = term_cache.take_foreign_changes()
+    if everything:
+        term_index.build(await async_crud.get_term_names(db))
+    elif names:
+        existing = {term.term for term in await async_crud.get_terms_by_names(db, list(names))}
+        for name in names:
+            if name in existing:
+                term_index.add(name)
+            else:
+                term_index.remove(name)
+    return term_index.search(prefix, limit)
+
+async def import_batch(db: AsyncSession, batch) -> int:
+    """Записать пачку импорта и добавить ее названия в индекс автодополнения
+
+    Слияние с индексом идет в отдельном потоке: на большом индексе оно
+    занимает сотни миллисекунд, и цикл событий в это время обслуживает запросы.
+    """
+    imported = await async_crud.upsert_terms(db, batch)
+    if batch:
+        await asyncio.to_thread(term_index.add_many, [row["term"] for row in batch])
+    return imported
+
+@app.post("/terms/import", response_model=schemas.ImportReport)
+async def import_terms(
+    file: UploadFile = File(..., description="NDJSON (объект на строку) или CSV с заголовком"),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="По умолчанию - по имени и типу файла"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Массовая загрузка терминов; существующие термины перезаписываются
+
+    Файл читается потоком, строки пишутся пачками по crud.IMPORT_BATCH_SIZE.
+    Некорректные строки пропускаются и попадают в отчет.
+    """
+    if format is None:
+        is_csv = (file.filename or "").lower().endswith(".csv") or "csv" in (file.content_type or "")
+        format = "csv" if is_csv else "ndjson"
+
+    report = schemas.ImportReport()
+    batch = []
     try:
-        terms = crud.get_all_terms(db)
-        return terms
-    except Exception as e:
-        print(f"Ошибка при получении терминов: {e}")
-        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+        async for line, row, error in term_io.parse_records(term_io.read_chunks(file), format):
+            if error is None:
+                try:
+                    batch.append(schemas.TermCreate(**row).dict())
+                except ValidationError as e:
+                    error = term_io.describe_validation_error(e)
+            if error is not None:
+                report.failed += 1
+                if len(report.errors) < MAX_REPORTED_IMPORT_ERRORS:
+                    term = row.get("term") if row else None
+                    report.errors.append(schemas.ImportRowError(
+                        line=line, term=term if isinstance(term, str) else None, error=error
+                    ))
+            if len(batch) >= crud.IMPORT_BATCH_SIZE:
+                report.imported += await import_batch(db, batch)
+                batch = []
+        report.imported += await import_batch(db, batch)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Файл не в кодировке UTF-8; до ошибки загружено строк: {report.imported}"
+        )
+    finally:
+        # Записанные пачки могли изменить любые термины
+        term_cache.invalidate()
+    return report
+
+@app.get("/terms/export")
+async def export_terms():
+    """Выгрузить все термины в NDJSON потоком, не загружая таблицу в память
+
+    Термины читаются пачками по id, на каждую пачку - своя короткая сессия:
+    медленный клиент не держит соединение из пула, пока читает ответ.
+    Поэтому выгрузка - не снимок: термины, измененные во время нее, могут
+    попасть в файл в новом виде или не попасть вовсе.
+    """
+    async def generate():
+        after = None
+        while True:
+            async with AsyncSessionLocal() as db:
+                rows, after = await async_crud.get_terms_page(db, EXPORT_BATCH_SIZE, after, "id")
+            if rows:
+                yield term_io.to_ndjson(rows)
+            if after is None:
+                return
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="glossary.ndjson"'}
+    )
+
+@app.post("/terms/batch", response_model=schemas.TermBatchResponse)
+async def get_terms_batch(request: schemas.TermBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """Получить много терминов за один запрос
+
+    Термины из кеша берутся готовыми, остальные читаются одним запросом
+    WHERE term IN (...) (по crud.LOOKUP_CHUNK_SIZE названий) и попадают в кеш.
+    """
+    names = list(dict.fromkeys(request.names))
+    bodies = {}
+    for name in names:
+        cached = term_cache.get_term(name)
+        if cached is not None:
+            bodies[name] = cached[0]
+
+    misses = [name for name in names if name not in bodies]
+    if misses:
+        generation = term_cache.generation
+        terms = await async_crud.get_terms_by_names(db, misses)
+        with profiling.serialization():
+            for term in terms:
+                body = schemas.TermResponse.model_validate(term).model_dump_json().encode("utf-8")
+                bodies[term.term] = body
+                term_cache.put_term(term.term, (body, term_validators(term)), generation)
+
+    # Тело собирается из готовых ответов отдельных терминов без повторной сериализации
+    with profiling.serialization():
+        found = b",".join(bodies[name] for name in names if name in bodies)
+        missing = term_io.dumps_json([name for name in names if name not in bodies])
+    return Response(b'{"terms":[' + found + b'],"missing":' + missing + b"}", media_type="application/json")
 
 @app.get("/terms/{term_name}", response_model=schemas.TermResponse)
-def get_term(term_name: str, db: Session = Depends(get_db)):
-    """Получить информацию о конкретном термине"""
-    term = crud.get_term(db, term_name)
-    if term is None:
-        raise HTTPException(status_code=404, detail="Термин не найден")
-    return term
+async def get_term(
+    term_name: str,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Получить информацию о конкретном термине; 304, если он не менялся с ETag из If-None-Match"""
+    cached = term_cache.get_term(term_name)
+    if cached is None:
+        generation = term_cache.generation
+        term = await async_crud.get_term(db, term_name)
+        if term is None:
+            raise HTTPException(status_code=404, detail="Термин не найден")
+        headers = term_validators(term)
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        with profiling.serialization():
+            body = schemas.TermResponse.model_validate(term).model_dump_json().encode("utf-8")
+        cached = (body, headers)
+        term_cache.put_term(term_name, cached, generation)
+    body, headers = cached
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 @app.post("/terms", response_model=schemas.TermResponse, status_code=201)
-def create_term(term: schemas.TermCreate, db: Session = Depends(get_db)):
+async def create_term(term: schemas.TermCreate, db: AsyncSession = Depends(get_async_db)):
     """Добавить новый термин"""
-    # Проверяем, существует ли уже такой термин
-    existing = crud.get_term(db, term.term)
-    if existing:
+    created = await async_crud.create_term(db, term)
+    if created is None:
         raise HTTPException(status_code=400, detail="Термин уже существует")
-    
-    return crud.create_term(db, term)
+    term_cache.invalidate(term.term)
+    return created
 
 @app.put("/terms/{term_name}", response_model=schemas.TermResponse)
-def update_term(term_name: str, term_update: schemas.TermUpdate, db: Session = Depends(get_db)):
+async def update_term(term_name: str, term_update: schemas.TermUpdate, db: AsyncSession = Depends(get_async_db)):
     """Обновить существующий термин"""
-    term = crud.update_term(db, term_name, term_update)
+    term = await async_crud.update_term(db, term_name, term_update)
     if term is None:
         raise HTTPException(status_code=404, detail="Термин не найден")
+    term_cache.invalidate(term_name)
     return term
 
 @app.delete("/terms/{term_name}", status_code=204)
-def delete_term(term_name: str, db: Session = Depends(get_db)):
+async def delete_term(term_name: str, db: AsyncSession = Depends(get_async_db)):
     """Удалить термин из глоссария"""
-    success = crud.delete_term(db, term_name)
+    success = await async_crud.delete_term(db, term_name)
     if not success:
         raise HTTPException(status_code=404, detail="Термин не найден")
+    term_cache.invalidate(term_name)
     return
 
 # Для запуска без Docker
@@ -0,0 +1,54 @@
+"""Асинхронные версии функций crud для AsyncSession
+
+Каждая функция выполняет одноименную функцию из crud через
+AsyncSession.run_sync: запросы идут через aiosqlite и не занимают поток
+из пула FastAPI, а сама работа с БД описана в одном месте - в crud.py.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+import crud
+import schemas
+
+async def get_glossary_version(db: AsyncSession):
+    """Версия глоссария и время его последнего изменения"""
+    return await db.run_sync(crud.get_glossary_version)
+
+async def get_term_names(db: AsyncSession):
+    """Получить названия всех терминов"""
+    return await db.run_sync(crud.get_term_names)
+
+async def get_terms_page(db: AsyncSession, limit: int = 100, after=None, order_by: str = "id", fields=None,
+                         category=None):
+    """Получить страницу терминов после значения ключа сортировки after"""
+    return await db.run_sync(crud.get_terms_page, limit, after, order_by, fields, category)
+
+async def get_category_counts(db: AsyncSession):
+    """Категории и число терминов в каждой"""
+    return await db.run_sync(crud.get_category_counts)
+
+async def search_terms(db: AsyncSession, query: str, limit: int = 20, offset: int = 0):
+    """Полнотекстовый поиск по терминам"""
+    return await db.run_sync(crud.search_terms, query, limit, offset)
+
+async def upsert_terms(db: AsyncSession, rows):
+    """Вставить или перезаписать пачку терминов"""
+    return await db.run_sync(crud.upsert_terms, rows)
+
+async def get_term(db: AsyncSession, term_name: str):
+    """Получить термин по названию"""
+    return await db.run_sync(crud.get_term, term_name)
+
+async def get_terms_by_names(db: AsyncSession, names):
+    """Получить термины по списку названий"""
+    return await db.run_sync(crud.get_terms_by_names, names)
+
+async def create_term(db: AsyncSession, term: schemas.TermCreate):
+    """Создать новый термин"""
+    return await db.run_sync(crud.create_term, term)
+
+async def update_term(db: AsyncSession, term_name: str, term_update: schemas.TermUpdate):
+    """Обновить существующий термин"""
+    return await db.run_sync(crud.update_term, term_name, term_update)
+
+async def delete_term(db: AsyncSession, term_name: str):
+    """Удалить термин"""
+    return await db.run_sync(crud.delete_term, term_name)
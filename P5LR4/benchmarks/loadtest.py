@@ -0,0 +1,329 @@
+"""Нагрузочный тест REST API глоссария
+
+Для каждой конфигурации (размер базы, режим БД, число воркеров) запускает
+uvicorn с приложением на свободном порту, заполняет базу терминами через
+POST /terms/import и гоняет сценарии с растущей конкурентностью
+(httpx.AsyncClient, каждый из N исполнителей шлет следующий запрос сразу
+после ответа на предыдущий):
+
+    list   - GET /terms: следующая страница терминов случайной категории
+             (по курсору X-Next-Cursor, после последней - снова первая)
+    get    - GET /terms/{term}: случайный термин
+    search - GET /terms/search: два слова из словаря описаний
+    create - POST /terms: новый термин
+    update - PUT /terms/{term}: новое описание случайного термина
+
+Печатает пропускную способность (успешные запросы в секунду), число ошибок
+и задержки p50/p95/p99. --cache on,off дополнительно гоняет сервер без
+кешей ответов (TERM_CACHE_SIZE=0, TERM_CACHE_PAGES=0), чтобы list и get
+измеряли БД, а не кеш. --output сохраняет результаты в JSON, --compare
+сравнивает прогон с сохраненным ранее.
+
+    pip install httpx
+    python benchmarks/loadtest.py --terms 1000,100000 --db memory,file --workers 1,4 \\
+        --concurrency 1,8,32 --requests 500 --output benchmarks/baseline.json
+    python benchmarks/loadtest.py --terms 1000,100000 --db memory,file --workers 1,4 \\
+        --concurrency 1,8,32 --requests 500 --compare benchmarks/baseline.json
+
+База в памяти у каждого процесса своя, поэтому режим memory запускается
+только с одним воркером. Клиент работает в одном процессе: при высокой
+конкурентности он сам может стать узким местом.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent
+
+SCENARIOS = ("list", "get", "search", "create", "update")
+CATEGORIES = [f"Категория {i}" for i in range(20)]
+WORDS = [
+    "функция", "класс", "модуль", "генератор", "итератор", "декоратор", "контекст",
+    "исключение", "словарь", "список", "кортеж", "множество", "строка", "байты",
+    "поток", "процесс", "корутина", "аннотация", "метакласс", "дескриптор",
+]
+SEED_CHUNK = 50000
+STARTUP_TIMEOUT = 120
+
+
+def term_name(number):
+    return f"term-{number:07d}"
+
+
+def make_term(number, rng):
+    return {
+        "term": term_name(number),
+        "description": " ".join(rng.sample(WORDS, 6)),
+        "category": CATEGORIES[number % len(CATEGORIES)],
+        "example": f"value_{number} = {number}",
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db, workers, cache, home):
+    """Запустить uvicorn и дождаться ответа на GET /; вернуть (процесс, base_url)"""
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL="sqlite:///:memory:" if db == "memory" else f"sqlite:///{home}/glossary.db",
+        TERM_CACHE_CHANNEL=f"{home}/cache.log" if workers > 1 else "",
+    )
+    if cache == "off":
+        env.update(TERM_CACHE_SIZE="0", TERM_CACHE_PAGES="0")
+    log = open(Path(home) / "server.log", "wb")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn завершился с кодом {process.returncode}, см. {log.name}")
+        try:
+            if httpx.get(base_url + "/").status_code == 200:
+                return process, base_url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"uvicorn не ответил за {STARTUP_TIMEOUT} с")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def seed(base_url, count, rng):
+    """Заполнить базу count терминами пачками через импорт"""
+    with httpx.Client(base_url=base_url, timeout=None) as client:
+        for start in range(0, count, SEED_CHUNK):
+            numbers = range(start, min(start + SEED_CHUNK, count))
+            data = "".join(json.dumps(make_term(n, rng), ensure_ascii=False) + "\n" for n in numbers)
+            response = client.post("/terms/import", files={"file": ("seed.ndjson", data.encode("utf-8"))})
+            response.raise_for_status()
+            report = response.json()
+            if report["failed"]:
+                raise RuntimeError(f"Ошибки при заполнении базы: {report['errors'][:3]}")
+
+
+class Workload:
+    """Генератор запросов сценария; новые термины получают уникальные названия"""
+
+    def __init__(self, terms, rng):
+        self.terms = terms
+        self.rng = rng
+        self.created = 0
+        self.run = f"{os.getpid()}-{int(time.time())}"
+        self.cursors = {}  # категория -> курсор следующей страницы
+
+    def request(self, scenario):
+        """(метод, путь, параметры, тело JSON)"""
+        rng = self.rng
+        if scenario == "list":
+            category = rng.choice(CATEGORIES)
+            params = {"limit": 100, "order_by": "term", "category": category}
+            cursor = self.cursors.pop(category, None)
+            if cursor is not None:
+                params["cursor"] = cursor
+            return "GET", "/terms", params, None
+        if scenario == "get":
+            return "GET", f"/terms/{term_name(rng.randrange(self.terms))}", None, None
+        if scenario == "search":
+            return "GET", "/terms/search", {"q": f"{rng.choice(WORDS)} {rng.choice(WORDS)[:4]}"}, None
+        if scenario == "create":
+            self.created += 1
+            body = {"term": f"new-{self.run}-{self.created}", "description": " ".join(rng.sample(WORDS, 6))}
+            return "POST", "/terms", None, body
+        body = {"description": " ".join(rng.sample(WORDS, 6))}
+        return "PUT", f"/terms/{term_name(rng.randrange(self.terms))}", None, body
+
+    def record(self, path, params, response):
+        """Запомнить курсор следующей страницы категории из ответа list"""
+        cursor = response.headers.get("X-Next-Cursor")
+        if path == "/terms" and cursor:
+            self.cursors[params["category"]] = cursor
+
+
+async def drive(base_url, workload, scenario, concurrency, requests):
+    """Выполнить requests запросов сценария; вернуть (длительности успешных, число ошибок, секунды)"""
+    # Запросы строятся по мере выполнения: list берет курсор из предыдущих ответов
+    jobs = (workload.request(scenario) for _ in range(requests))
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for method, path, params, body in jobs:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, params=params, json=body)
+                    ok = response.status_code < 400
+                    if ok:
+                        workload.record(path, params, response)
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+
+def percentile(sorted_values, share):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(share * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 2)
+
+
+def run_configuration(terms, db, workers, cache, scenarios, levels, requests, rng, print_row):
+    rows = []
+    with tempfile.TemporaryDirectory() as home:
+        process, base_url = start_server(db, workers, cache, home)
+        try:
+            seed(base_url, terms, rng)
+            workload = Workload(terms, rng)
+            for scenario in scenarios:
+                # Прогрев: соединения, кеши SQLite и ответов
+                asyncio.run(drive(base_url, workload, scenario, 4, 20))
+                for level in levels:
+                    latencies, errors, elapsed = asyncio.run(drive(base_url, workload, scenario, level, requests))
+                    latencies.sort()
+                    row = {
+                        "terms": terms,
+                        "db": db,
+                        "workers": workers,
+                        "cache": cache,
+                        "scenario": scenario,
+                        "concurrency": level,
+                        "requests": requests,
+                        "errors": errors,
+                        "seconds": round(elapsed, 3),
+                        # Ошибки в пропускную способность не входят, они - в errors
+                        "throughput_rps": round(len(latencies) / elapsed, 1),
+                        "p50_ms": percentile(latencies, 0.50),
+                        "p95_ms": percentile(latencies, 0.95),
+                        "p99_ms": percentile(latencies, 0.99),
+                    }
+                    rows.append(row)
+                    print_row(row)
+        finally:
+            stop_server(process)
+    return rows
+
+
+def row_key(row):
+    # В прогонах без колонки cache кеши были включены
+    return row["terms"], row["db"], row["workers"], row.get("cache", "on"), row["scenario"], row["concurrency"]
+
+
+def format_row(row, baseline=None):
+    def show(value):
+        return "-" if value is None else str(value)
+    line = (
+        f"{row['terms']:>8}{row['db']:>8}{row['workers']:>5}{row['cache']:>5}{row['scenario']:>9}"
+        f"{row['concurrency']:>6}"
+        f"{row['errors']:>7}{row['throughput_rps']:>10}{show(row['p50_ms']):>9}{show(row['p95_ms']):>9}"
+        f"{show(row['p99_ms']):>9}"
+    )
+    if baseline is not None:
+        old = baseline.get(row_key(row))
+        if not old or not old["throughput_rps"]:
+            ratio = "-"
+        else:
+            ratio = f"x{row['throughput_rps'] / old['throughput_rps']:.2f}"
+        line += f"{ratio:>9}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест REST API глоссария")
+    parser.add_argument("--terms", default="1000", help="Размеры базы через запятую, например 1000,100000,1000000")
+    parser.add_argument("--db", default="memory,file", help="Режимы БД через запятую: memory, file")
+    parser.add_argument("--workers", default="1,4", help="Числа воркеров uvicorn через запятую")
+    parser.add_argument("--cache", default="on", help="Кеши ответов через запятую: on, off")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Сценарии через запятую")
+    parser.add_argument("--concurrency", default="1,8,32", help="Уровни конкурентности через запятую")
+    parser.add_argument("--requests", type=int, default=500, help="Запросов на каждый сценарий и уровень")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего прогона: показать отношение пропускной способности")
+    args = parser.parse_args()
+
+    scenarios = args.scenarios.split(",")
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+    caches = args.cache.split(",")
+    if set(caches) - {"on", "off"}:
+        parser.error("--cache принимает on и off")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {row_key(row): row for row in json.load(f)["results"]}
+
+    header = (f"{'терминов':>8}{'БД':>8}{'восп':>5}{'кеш':>5}{'сценарий':>9}{'конк.':>6}{'ошибки':>7}"
+              f"{'rps':>10}{'p50 мс':>9}{'p95 мс':>9}{'p99 мс':>9}")
+    print(header + (f"{'к базе':>9}" if baseline else ""), flush=True)
+
+    rng = random.Random(args.seed)
+    results = []
+    for terms in (int(value) for value in args.terms.split(",")):
+        for db in args.db.split(","):
+            for workers in (int(value) for value in args.workers.split(",")):
+                if db == "memory" and workers > 1:
+                    continue
+                for cache in caches:
+                    results += run_configuration(
+                        terms, db, workers, cache, scenarios, levels, args.requests, rng,
+                        lambda row: print(format_row(row, baseline), flush=True)
+                    )
+
+    if args.output:
+        report = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "args": vars(args),
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
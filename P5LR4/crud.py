@@ -1,43 +1,194 @@
+from datetime import datetime, timezone
+import unicodedata
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from models import Term
+from models import GlossaryMeta, Term
+from term_index import term_index
 import schemas
 
-def get_all_terms(db: Session):
-    """Получить все термины"""
-    return db.query(Term).all()
+TERM_FIELDS = ("id", "term", "description", "category", "example")
+TERM_COLUMNS = tuple(getattr(Term, name) for name in TERM_FIELDS)
+# Сколько строк импорта записывается одним executemany и одной транзакцией
+IMPORT_BATCH_SIZE = 5000
+# Сколько названий передается в один WHERE term IN (...)
+LOOKUP_CHUNK_SIZE = 500
+
+def utcnow():
+    """Текущее время UTC без часового пояса - так DateTime хранится в SQLite"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def get_glossary_version(db: Session):
+    """Версия глоссария и время его последнего изменения (unix time)"""
+    return tuple(db.execute(
+        select(GlossaryMeta.version, GlossaryMeta.updated_at).where(GlossaryMeta.id == 1)
+    ).one())
+
+def get_term_names(db: Session):
+    """Получить названия всех терминов (для индекса автодополнения)"""
+    return [name for (name,) in db.query(Term.term)]
+
+def get_terms_page(db: Session, limit: int = 100, after=None, order_by: str = "id", fields=None,
+                   category=None):
+    """Получить страницу терминов после значения ключа сортировки after (keyset-пагинация)
+
+    Если задана category, выбираются только термины этой категории: при
+    order_by=term по индексу ix_terms_category_term, при order_by=id - по
+    ix_terms_category_id, в обоих случаях без сортировки всей категории.
+    Выбираются только колонки из fields: Core select возвращает кортежи, из
+    которых сразу строятся словари для JSON, без ORM-объектов и моделей pydantic.
+    Возвращает список словарей и ключ последней строки, если есть следующая страница.
+    """
+    key = getattr(Term, order_by)
+    fields = list(fields or TERM_FIELDS)
+    columns = [getattr(Term, name) for name in fields]
+    if order_by not in fields:
+        columns.append(key)
+
+    statement = select(*columns)
+    if category is not None:
+        statement = statement.where(Term.category == category)
+    if after is not None:
+        statement = statement.where(key > after)
+    rows = db.execute(statement.order_by(key).limit(limit + 1)).all()
+
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_after = last[fields.index(order_by)] if order_by in fields else last[-1]
+    # zip останавливается на полях: лишняя колонка ключа сортировки в ответ не попадает
+    items = [dict(zip(fields, row)) for row in rows]
+    return items, next_after
+
+CATEGORY_COUNTS_SQL = text("SELECT category, count FROM category_counts ORDER BY category")
+
+def get_category_counts(db: Session):
+    """Категории и число терминов в каждой (из счетчиков, без GROUP BY по terms)"""
+    return [
+        {"category": category or None, "count": count}
+        for category, count in db.execute(CATEGORY_COUNTS_SQL)
+    ]
+
+SEARCH_SQL = text("""
+    SELECT t.id, t.term, t.description, t.category, t.example,
+           snippet(terms_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+           bm25(terms_fts, 10.0, 1.0, 0.5) AS rank
+    FROM terms_fts
+    JOIN terms AS t ON t.id = terms_fts.rowid
+    WHERE terms_fts MATCH :match
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""")
+
+def build_match_query(query: str) -> str:
+    """Запрос пользователя в синтаксисе FTS5: каждое слово в кавычках, последнее - как префикс
+
+    Управляющие символы выбрасываются: на "\x00" разбор MATCH в SQLite падает
+    с "unterminated string".
+    """
+    words = ["".join(ch for ch in word if unicodedata.category(ch) != "Cc") for word in query.split()]
+    words = ['"' + word.replace('"', '""') + '"' for word in words if word]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+def search_terms(db: Session, query: str, limit: int = 20, offset: int = 0):
+    """Полнотекстовый поиск по term, description и example, лучшие совпадения первыми
+
+    Возвращает найденные строки со сниппетами и признак наличия следующей страницы.
+    """
+    match = build_match_query(query)
+    if not match:
+        return [], False
+    rows = db.execute(SEARCH_SQL, {"match": match, "limit": limit + 1, "offset": offset}).mappings().all()
+    return rows[:limit], len(rows) > limit
+
+def upsert_terms(db: Session, rows):
+    """Вставить термины пачкой, существующие (по названию) - перезаписать
+
+    rows - словари полей TermCreate. Вся пачка уходит одним executemany
+    и фиксируется одной транзакцией. Возвращает число записанных строк.
+    Индекс автодополнения обновляет вызывающий код (см. import_terms в app/main.py).
+    """
+    if not rows:
+        return 0
+    now = utcnow()
+    statement = insert(Term)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Term.term],
+        set_={
+            "description": statement.excluded.description,
+            "category": statement.excluded.category,
+            "example": statement.excluded.example,
+            "version": Term.version + 1,
+            "updated_at": statement.excluded.updated_at,
+        }
+    )
+    db.execute(statement, [dict(row, updated_at=now) for row in rows])
+    db.commit()
+    return len(rows)
 
 def get_term(db: Session, term_name: str):
     """Получить термин по названию"""
     return db.query(Term).filter(Term.term == term_name).first()
 
+def get_terms_by_names(db: Session, names):
+    """Термины с названиями из names одним WHERE term IN (...) на каждые LOOKUP_CHUNK_SIZE названий
+
+    Кроме полей ответа выбираются version и updated_at - для ETag.
+    """
+    columns = (*TERM_COLUMNS, Term.version, Term.updated_at)
+    found = []
+    for start in range(0, len(names), LOOKUP_CHUNK_SIZE):
+        chunk = names[start:start + LOOKUP_CHUNK_SIZE]
+        found += db.execute(select(*columns).where(Term.term.in_(chunk))).all()
+    return found
+
 def create_term(db: Session, term: schemas.TermCreate):
-    """Создать новый термин"""
-    db_term = Term(**term.dict())
-    db.add(db_term)
-    db.commit()
-    db.refresh(db_term)
+    """Создать новый термин одним INSERT ... RETURNING
+
+    Уникальность названия проверяет индекс: если термин уже есть, возвращается None.
+    """
+    statement = insert(Term).values(**term.dict(), updated_at=utcnow()).returning(*TERM_COLUMNS)
+    try:
+        db_term = db.execute(statement).one()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    term_index.add(db_term.term)
     return db_term
 
 def update_term(db: Session, term_name: str, term_update: schemas.TermUpdate):
-    """Обновить существующий термин"""
-    db_term = get_term(db, term_name)
-    if not db_term:
-        return None
-    
+    """Обновить существующий термин одним UPDATE ... RETURNING; None - термина нет"""
     update_data = term_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_term, key, value)
-    
+    if not update_data:
+        return db.execute(select(*TERM_COLUMNS).where(Term.term == term_name)).first()
+
+    statement = (
+        update(Term)
+        .where(Term.term == term_name)
+        .values(**update_data, version=Term.version + 1, updated_at=utcnow())
+        .returning(*TERM_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    db_term = db.execute(statement).first()
     db.commit()
-    db.refresh(db_term)
     return db_term
 
 def delete_term(db: Session, term_name: str):
-    """Удалить термин"""
-    db_term = get_term(db, term_name)
-    if not db_term:
-        return False
-    
-    db.delete(db_term)
+    """Удалить термин одним DELETE ... RETURNING; False - термина нет"""
+    statement = (
+        delete(Term)
+        .where(Term.term == term_name)
+        .returning(Term.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = db.execute(statement).first()
     db.commit()
-    return True
\ No newline at end of file
+    if deleted is None:
+        return False
+    term_index.remove(term_name)
+    return True
@@ -1,29 +1,79 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-# Используем SQLite в памяти с StaticPool
-DATABASE_URL = "sqlite:///:memory:"
+# По умолчанию SQLite в памяти; DATABASE_URL=sqlite:///data/glossary.db включает
+# файловую базу в режиме WAL, которую одновременно читают несколько воркеров uvicorn
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///:memory:")
+IN_MEMORY = DATABASE_URL in ("sqlite://", "sqlite:///:memory:")
+# Тот же адрес для асинхронного драйвера aiosqlite
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool  # Сохраняем соединение между запросами
+# Настройки соединений файловой базы
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # читатели не блокируют писателя и друг друга
+    "PRAGMA synchronous=NORMAL",  # в WAL безопасно и без fsync на каждый коммит
+    "PRAGMA busy_timeout=5000",  # ждать блокировку другого воркера, а не падать
+    "PRAGMA mmap_size=268435456",  # 256 МБ файла читаются через mmap
+    "PRAGMA cache_size=-65536",  # 64 МБ страничного кеша на соединение
+    "PRAGMA temp_store=MEMORY",
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Применить PRAGMA к каждому новому соединению"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
 
-Base = declarative_base()
+if IN_MEMORY:
+    # Одно соединение на все запросы, иначе у каждого была бы своя пустая база.
+    # Пул из одного соединения, а не StaticPool: сессии получают его по очереди.
+    # Иначе параллельные запросы смешивали бы транзакции на общем соединении
+    # ("cannot commit transaction - SQL statements in progress")
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0
+    )
+else:
+    database_dir = os.path.dirname(DATABASE_URL.split(":///", 1)[1])
+    if database_dir:
+        os.makedirs(database_dir, exist_ok=True)
+
+    # Пул соединений: запросы не ждут одно общее соединение
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"timeout": 30},
+        poolclass=AsyncAdaptedQueuePool,  # для файлов aiosqlite по умолчанию берет NullPool
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    )
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+# Объекты не истекают после commit: ленивая загрузка вне run_sync в async-режиме невозможна
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
-def init_db():
-    """Создание таблиц при запуске"""
-    Base.metadata.create_all(bind=engine)
+Base = declarative_base()
 
-def get_db():
-    """Получение сессии БД"""
-    db = SessionLocal()
+async def init_async_db():
+    """Создание таблиц через асинхронный движок"""
     try:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    except OperationalError:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+async def close_async_db():
+    """Закрыть соединения aiosqlite (их потоки иначе не дают процессу завершиться)"""
+    await async_engine.dispose()
+
+async def get_async_db():
+    """Получение асинхронной сессии БД"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, event
 from database import Base
 
 class Term(Base):
@@ -8,4 +8,137 @@ class Term(Base):
     term = Column(String, unique=True, index=True, nullable=False)
     description = Column(Text, nullable=False)
     category = Column(String, default="Общие")
-    example = Column(Text, nullable=True)
\ No newline at end of file
+    example = Column(Text, nullable=True)
+    # Номер правки термина и время последней записи (UTC) - для ETag и Last-Modified
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Фильтр по категории с сортировкой по названию (order_by=term) читает только этот индекс
+        Index("ix_terms_category_term", "category", "term"),
+        # То же для сортировки по id (order_by=id, по умолчанию): страница читается
+        # по индексу по порядку, без сортировки всей категории во временном B-дереве
+        Index("ix_terms_category_id", "category", "id"),
+    )
+
+class GlossaryMeta(Base):
+    """Единственная строка (id=1) с версией всего глоссария
+
+    Версия растет при любом изменении terms и поддерживается триггерами
+    GLOSSARY_VERSION_DDL, поэтому учитывает и массовые записи.
+    """
+    __tablename__ = "glossary_meta"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(Integer, nullable=False)  # unix time последнего изменения
+
+# Колонки, добавленные в terms после первых версий: в старых базах их создает migrate_terms
+TERM_MIGRATIONS = (
+    ("version", "ALTER TABLE terms ADD COLUMN version INTEGER NOT NULL DEFAULT 1"),
+    ("updated_at", "ALTER TABLE terms ADD COLUMN updated_at DATETIME"),
+)
+
+_BUMP_GLOSSARY_VERSION = """
+    UPDATE glossary_meta
+    SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE id = 1;
+"""
+
+GLOSSARY_VERSION_DDL = (
+    """INSERT OR IGNORE INTO glossary_meta(id, version, updated_at)
+       VALUES (1, 0, CAST(strftime('%s', 'now') AS INTEGER))""",
+    f"CREATE TRIGGER IF NOT EXISTS glossary_version_ai AFTER INSERT ON terms BEGIN {_BUMP_GLOSSARY_VERSION} END",
+    f"CREATE TRIGGER IF NOT EXISTS glossary_version_au AFTER UPDATE ON terms BEGIN {_BUMP_GLOSSARY_VERSION} END",
+    f"CREATE TRIGGER IF NOT EXISTS glossary_version_ad AFTER DELETE ON terms BEGIN {_BUMP_GLOSSARY_VERSION} END",
+)
+
+# Полнотекстовый индекс FTS5 над terms (external content: текст хранится только в terms).
+# Триггеры поддерживают его при любых INSERT/UPDATE/DELETE, в том числе массовых
+TERM_SEARCH_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS terms_fts USING fts5(
+        term, description, example,
+        content='terms', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS terms_fts_ai AFTER INSERT ON terms BEGIN
+        INSERT INTO terms_fts(rowid, term, description, example)
+        VALUES (new.id, new.term, new.description, new.example);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS terms_fts_ad AFTER DELETE ON terms BEGIN
+        INSERT INTO terms_fts(terms_fts, rowid, term, description, example)
+        VALUES ('delete', old.id, old.term, old.description, old.example);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS terms_fts_au AFTER UPDATE OF term, description, example ON terms BEGIN
+        INSERT INTO terms_fts(terms_fts, rowid, term, description, example)
+        VALUES ('delete', old.id, old.term, old.description, old.example);
+        INSERT INTO terms_fts(rowid, term, description, example)
+        VALUES (new.id, new.term, new.description, new.example);
+    END""",
+)
+
+@event.listens_for(Base.metadata, "after_create")
+def migrate_terms(target, connection, **kw):
+    """Добавить в terms недостающие колонки (create_all не меняет существующие таблицы)"""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(terms)")}
+    for name, ddl in TERM_MIGRATIONS:
+        if name not in columns:
+            connection.exec_driver_sql(ddl)
+    # Индексы, добавленные в модель позже создания таблицы
+    for index in Term.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+@event.listens_for(Base.metadata, "after_create")
+def create_version_tracking(target, connection, **kw):
+    """Создать строку версии глоссария и триггеры, которые ее увеличивают"""
+    for ddl in GLOSSARY_VERSION_DDL:
+        connection.exec_driver_sql(ddl)
+
+# Число терминов в каждой категории (NULL учитывается как ''), поддерживается триггерами:
+# GET /categories читает готовые счетчики вместо GROUP BY по всей таблице
+CATEGORY_COUNTS_DDL = (
+    """CREATE TABLE IF NOT EXISTS category_counts (
+        category TEXT PRIMARY KEY,
+        count INTEGER NOT NULL
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS category_counts_ai AFTER INSERT ON terms BEGIN
+        INSERT INTO category_counts(category, count) VALUES (COALESCE(new.category, ''), 1)
+        ON CONFLICT(category) DO UPDATE SET count = count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS category_counts_ad AFTER DELETE ON terms BEGIN
+        UPDATE category_counts SET count = count - 1 WHERE category = COALESCE(old.category, '');
+        DELETE FROM category_counts WHERE category = COALESCE(old.category, '') AND count <= 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS category_counts_au AFTER UPDATE OF category ON terms
+    WHEN old.category IS NOT new.category BEGIN
+        UPDATE category_counts SET count = count - 1 WHERE category = COALESCE(old.category, '');
+        DELETE FROM category_counts WHERE category = COALESCE(old.category, '') AND count <= 0;
+        INSERT INTO category_counts(category, count) VALUES (COALESCE(new.category, ''), 1)
+        ON CONFLICT(category) DO UPDATE SET count = count + 1;
+    END""",
+)
+
+@event.listens_for(Base.metadata, "after_create")
+def create_category_counts(target, connection, **kw):
+    """Создать счетчики категорий; для уже заполненной базы - посчитать существующие строки"""
+    existed = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_counts'"
+    ).first()
+    for ddl in CATEGORY_COUNTS_DDL:
+        connection.exec_driver_sql(ddl)
+    if not existed:
+        connection.exec_driver_sql(
+            "INSERT INTO category_counts(category, count) "
+            "SELECT COALESCE(category, ''), count(*) FROM terms GROUP BY 1"
+        )
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    """Создать индекс поиска; для уже заполненной базы - проиндексировать существующие строки"""
+    existed = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'terms_fts'"
+    ).first()
+    for ddl in TERM_SEARCH_DDL:
+        connection.exec_driver_sql(ddl)
+    if not existed:
+        connection.exec_driver_sql("INSERT INTO terms_fts(terms_fts) VALUES ('rebuild')")
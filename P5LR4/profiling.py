@@ -0,0 +1,178 @@
+"""Профилирование запросов к API глоссария
+
+Middleware заводит на каждый HTTP-запрос RequestProfile, события движков
+SQLAlchemy добавляют в него число SQL-запросов и время в БД, обработчики -
+время сериализации (serialization()). Итог попадает в заголовок
+Server-Timing и в гистограммы для /metrics. SQL-запросы дольше
+SLOW_QUERY_MS пишутся в лог glossary.slow_query вместе с EXPLAIN QUERY PLAN.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+# Для остальных запросов (DDL, PRAGMA) план не строится
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+slow_query_log = logging.getLogger("glossary.slow_query")
+
+_current = ContextVar("glossary_request_profile", default=None)
+
+
+class RequestProfile:
+    """Счетчики одного HTTP-запроса"""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    def server_timing(self, total_seconds):
+        """Значение заголовка Server-Timing (длительности в миллисекундах)"""
+        return (
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} statements", '
+            f"serialize;dur={self.serialize_seconds * 1000:.2f}, "
+            f"total;dur={total_seconds * 1000:.2f}"
+        )
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками (route, method)"""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # метки -> (счетчики по корзинам, сумма)
+
+    def observe(self, labels, value):
+        counts, total = self._series.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._series[labels] = (counts, total + value)
+
+    def to_prometheus(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for (route, method), (counts, total) in sorted(self._series.items()):
+            labels = f'route="{route}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class RequestMetrics:
+    """Гистограммы запросов процесса (у каждого воркера uvicorn свои)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            "glossary_request_seconds", "Длительность обработки запроса", LATENCY_BUCKETS
+        )
+        self.db_time = Histogram(
+            "glossary_request_db_seconds", "Время SQL-запросов за HTTP-запрос", LATENCY_BUCKETS
+        )
+        self.serialize_time = Histogram(
+            "glossary_request_serialize_seconds", "Время сериализации ответа", LATENCY_BUCKETS
+        )
+        self.statements = Histogram(
+            "glossary_request_statements", "Число SQL-запросов за HTTP-запрос", STATEMENT_BUCKETS
+        )
+        self.slow_queries = 0
+
+    def observe(self, route, method, profile, total_seconds):
+        labels = (route, method)
+        with self._lock:
+            self.latency.observe(labels, total_seconds)
+            self.db_time.observe(labels, profile.db_seconds)
+            self.serialize_time.observe(labels, profile.serialize_seconds)
+            self.statements.observe(labels, profile.statements)
+
+    def record_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def to_prometheus(self):
+        """Все метрики в текстовом формате Prometheus"""
+        with self._lock:
+            lines = []
+            for histogram in (self.latency, self.db_time, self.serialize_time, self.statements):
+                lines += histogram.to_prometheus()
+            lines += [
+                "# HELP glossary_slow_queries_total SQL-запросы дольше SLOW_QUERY_MS",
+                "# TYPE glossary_slow_queries_total counter",
+                f"glossary_slow_queries_total {self.slow_queries}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = RequestMetrics()
+
+
+def start_request():
+    """Начать профиль текущего запроса"""
+    profile = RequestProfile()
+    _current.set(profile)
+    return profile
+
+
+@contextmanager
+def serialization():
+    """Учесть время блока как сериализацию ответа текущего запроса"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile = _current.get()
+        if profile is not None:
+            profile.serialize_seconds += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    profile = _current.get()
+    if profile is not None:
+        profile.statements += 1
+        profile.db_seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        metrics.record_slow_query()
+        first_parameters = parameters[0] if executemany and parameters else parameters
+        slow_query_log.warning(
+            "Медленный запрос %.1f мс: %s\nПараметры: %r\nПлан:\n%s",
+            elapsed * 1000, statement, first_parameters,
+            _explain(conn, statement, first_parameters)
+        )
+
+
+def _explain(conn, statement, parameters):
+    """EXPLAIN QUERY PLAN запроса через то же соединение DBAPI"""
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return "  -"
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+        return "\n".join(f"  {row[-1]}" for row in cursor.fetchall())
+    except Exception as e:
+        return f"  недоступен: {e}"
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine):
+    """Подключить учет SQL-запросов к синхронному движку (для async - engine.sync_engine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class TermBase(BaseModel):
     term: str
@@ -15,8 +15,48 @@ class TermUpdate(BaseModel):
     category: Optional[str] = None
     example: Optional[str] = None
 
+class TermListItem(BaseModel):
+    """Элемент списка терминов: при выборе полей (fields) остальные не возвращаются"""
+    id: Optional[int] = None
+    term: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    example: Optional[str] = None
+
 class TermResponse(TermBase):
     id: int
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TermBatchRequest(BaseModel):
+    """Названия терминов для пакетного получения"""
+    names: List[str] = Field(..., max_length=1000)
+
+class TermBatchResponse(BaseModel):
+    """Найденные термины в порядке запроса и названия, которых нет в глоссарии"""
+    terms: List[TermResponse]
+    missing: List[str]
+
+class CategoryCount(BaseModel):
+    """Категория и число терминов в ней"""
+    category: Optional[str] = None
+    count: int
+
+class TermSearchResult(TermResponse):
+    """Результат поиска: термин, фрагмент с подсветкой совпадений и релевантность (меньше - лучше)"""
+    snippet: str
+    rank: float
+
+
+class ImportRowError(BaseModel):
+    """Строка файла импорта, которую не удалось загрузить"""
+    line: int
+    term: Optional[str] = None
+    error: str
+
+class ImportReport(BaseModel):
+    """Итог импорта: сколько строк записано, сколько отклонено и первые ошибки"""
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
@@ -0,0 +1,188 @@
+"""Кеш готовых JSON-ответов API глоссария в памяти процесса
+
+Хранит сериализованные ответы GET /terms/{term} (по названию) и страницы
+GET /terms (по параметрам запроса). Обработчики записи сбрасывают термин
+и все страницы списка. При нескольких воркерах uvicorn сбросы передаются
+через общий файл-журнал TERM_CACHE_CHANNEL: каждый воркер дописывает в него
+строки [pid, название измененного термина], а перед чтением из кеша
+проверяет (os.stat), не появилось ли в журнале новых строк. Свои строки
+(по pid) воркер пропускает: свой кеш он уже сбросил при записи. Названия из
+чужих строк копятся до вызова take_foreign_changes(): по ним обработчик
+автодополнения обновляет индекс названий своего процесса.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+TERM_CACHE_SIZE = int(os.getenv("TERM_CACHE_SIZE", "10000"))
+TERM_CACHE_PAGES = int(os.getenv("TERM_CACHE_PAGES", "256"))
+TERM_CACHE_CHANNEL = os.getenv("TERM_CACHE_CHANNEL")
+# Журнал больше этого размера заменяется пустым; воркеры, заметив замену, сбрасывают кеш целиком
+CHANNEL_MAX_SIZE = 1024 * 1024
+# Больше стольких накопленных чужих названий - считать, что изменилось все
+FOREIGN_CHANGES_LIMIT = 10000
+
+
+class TermCache:
+    """LRU сериализованных ответов с точечным сбросом
+
+    generation увеличивается при каждом сбросе. Обработчик запоминает его до
+    чтения из БД и передает в put_*: если за время запроса был сброс,
+    возможно устаревший ответ в кеш не попадет.
+    """
+
+    def __init__(self, max_size=TERM_CACHE_SIZE, max_pages=TERM_CACHE_PAGES, channel=TERM_CACHE_CHANNEL):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.channel = channel
+        self.generation = 0
+        self._terms = OrderedDict()
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        # Чужие изменения для take_foreign_changes: названия и признак "изменилось все"
+        self._foreign_names = set()
+        self._foreign_all = False
+        # Позиция в журнале: (inode, смещение); чужие записи до старта нас не касаются
+        self._position = self._channel_end() if channel else None
+
+    def get_term(self, name):
+        """Ответ для термина (тело, заголовки) или None"""
+        return self._get(self._terms, name)
+
+    def put_term(self, name, entry, generation):
+        self._put(self._terms, name, entry, generation, self.max_size)
+
+    def get_page(self, key):
+        """Закешированная страница списка (тело, заголовки) или None"""
+        return self._get(self._pages, key)
+
+    def put_page(self, key, page, generation):
+        self._put(self._pages, key, page, generation, self.max_pages)
+
+    def invalidate(self, name=None):
+        """Сбросить термин (или весь кеш при name=None) здесь и в остальных воркерах"""
+        self._drop(name)
+        if self.channel:
+            self._publish(name)
+
+    def take_foreign_changes(self):
+        """Изменения других воркеров с прошлого вызова: (названия, изменилось ли все)
+
+        Без журнала всегда (пустое множество, False).
+        """
+        if not self.channel:
+            return set(), False
+        self._poll_channel()
+        with self._lock:
+            changes = self._foreign_names, self._foreign_all
+            self._foreign_names, self._foreign_all = set(), False
+        return changes
+
+    def _get(self, entries, key):
+        if self.channel:
+            self._poll_channel()
+        with self._lock:
+            value = entries.get(key)
+            if value is not None:
+                entries.move_to_end(key)
+            return value
+
+    def _put(self, entries, key, value, generation, limit):
+        if limit <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > limit:
+                entries.popitem(last=False)
+
+    def _drop(self, name):
+        with self._lock:
+            self.generation += 1
+            if name is None:
+                self._terms.clear()
+            else:
+                self._terms.pop(name, None)
+            # Любая запись может изменить любую страницу списка
+            self._pages.clear()
+
+    def _channel_end(self):
+        try:
+            stat = os.stat(self.channel)
+        except FileNotFoundError:
+            return None, 0
+        return stat.st_ino, stat.st_size
+
+    def _publish(self, name):
+        """Дописать сброс в журнал (строки короче PIPE_BUF дописываются атомарно)"""
+        line = (json.dumps([os.getpid(), name], ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.channel, "ab") as f:
+            f.write(line)
+            f.flush()
+            size = f.tell()
+            written_to = os.fstat(f.fileno()).st_ino
+        if self._channel_end()[0] != written_to:
+            # Журнал заменили между open и write: запись ушла в старый файл
+            with open(self.channel, "ab") as f:
+                f.write(line)
+        elif size > CHANNEL_MAX_SIZE:
+            tmp = f"{self.channel}.{os.getpid()}.tmp"
+            open(tmp, "wb").close()
+            os.replace(tmp, self.channel)
+
+    def _poll_channel(self):
+        """Применить сбросы, которые другие воркеры дописали в журнал"""
+        inode, offset = self._position
+        try:
+            stat = os.stat(self.channel)
+        except FileNotFoundError:
+            if inode is not None:
+                self._drop_foreign(None)
+                self._position = None, 0
+            return
+        if stat.st_ino == inode and stat.st_size == offset:
+            return
+
+        with open(self.channel, "rb") as f:
+            current = os.fstat(f.fileno()).st_ino
+            if inode is None:
+                # Журнал появился после старта: все его строки новые
+                inode, offset = current, 0
+            elif current != inode:
+                # Журнал заменен: неизвестно, что было пропущено
+                self._drop_foreign(None)
+                f.seek(0, os.SEEK_END)
+                self._position = current, f.tell()
+                return
+            f.seek(offset)
+            data = f.read()
+
+        # Только целые строки; оборванная будет дочитана в следующий раз
+        data = data[:data.rfind(b"\n") + 1]
+        self._position = inode, offset + len(data)
+        pid = os.getpid()
+        for line in data.decode("utf-8").splitlines():
+            try:
+                author, name = json.loads(line)
+            except (ValueError, TypeError):
+                self._drop_foreign(None)
+                continue
+            if author != pid:
+                self._drop_foreign(name)
+
+    def _drop_foreign(self, name):
+        """Сброс, пришедший из журнала; название запоминается для take_foreign_changes"""
+        self._drop(name)
+        with self._lock:
+            if name is None or len(self._foreign_names) >= FOREIGN_CHANGES_LIMIT:
+                self._foreign_names.clear()
+                self._foreign_all = True
+            elif not self._foreign_all:
+                self._foreign_names.add(name)
+
+
+# Общий кеш процесса
+term_cache = TermCache()
@@ -0,0 +1,90 @@
+"""Индекс названий терминов в памяти для автодополнения"""
+import threading
+from bisect import bisect_left
+from heapq import merge
+from itertools import groupby
+
+# Сколько раз add_many сливает без блокировки, прежде чем взять ее на все слияние
+MERGE_ATTEMPTS = 3
+
+
+class PrefixIndex:
+    """Отсортированный массив названий для поиска по префиксу без обращения к БД
+
+    Названия сравниваются без учета регистра (casefold). Все названия
+    с общим префиксом лежат в массиве подряд, поэтому поиск top-k - это
+    бинарный поиск начала диапазона и срез из k элементов.
+
+    add_many сливает массив без блокировки (например, в отдельном потоке):
+    поиск и запись в это время продолжаются, а слияние, во время которого
+    массив изменился, повторяется.
+    """
+
+    def __init__(self):
+        self._keys = []  # пары (casefold-ключ, название), по возрастанию
+        self._changes = 0  # счетчик изменений: по нему add_many замечает чужую запись
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def build(self, names):
+        """Заполнить индекс заново"""
+        keys = sorted((name.casefold(), name) for name in names)
+        with self._lock:
+            self._keys = keys
+            self._changes += 1
+
+    def add(self, name):
+        """Добавить название (повторное добавление ничего не меняет)"""
+        item = (name.casefold(), name)
+        with self._lock:
+            position = bisect_left(self._keys, item)
+            if position == len(self._keys) or self._keys[position] != item:
+                self._keys.insert(position, item)
+                self._changes += 1
+
+    def add_many(self, names):
+        """Добавить много названий сразу
+
+        Новые названия сортируются отдельно и сливаются с индексом за один
+        проход (heapq.merge) без пересортировки всего массива. Если индекс
+        изменился во время слияния, результат отбрасывается и слияние
+        повторяется; после MERGE_ATTEMPTS неудач оно выполняется под блокировкой.
+        """
+        items = sorted({(name.casefold(), name) for name in names})
+        if not items:
+            return
+        for _ in range(MERGE_ATTEMPTS):
+            with self._lock:
+                keys, changes = self._keys, self._changes
+            merged = [item for item, _ in groupby(merge(keys, items))]
+            with self._lock:
+                if self._changes == changes:
+                    self._keys = merged
+                    self._changes += 1
+                    return
+        with self._lock:
+            self._keys = [item for item, _ in groupby(merge(self._keys, items))]
+            self._changes += 1
+
+    def remove(self, name):
+        """Удалить название, если оно есть"""
+        item = (name.casefold(), name)
+        with self._lock:
+            position = bisect_left(self._keys, item)
+            if position < len(self._keys) and self._keys[position] == item:
+                del self._keys[position]
+                self._changes += 1
+
+    def search(self, prefix, limit=10):
+        """До limit названий, начинающихся с prefix, в алфавитном порядке"""
+        key = prefix.casefold()
+        with self._lock:
+            position = bisect_left(self._keys, (key,))
+            candidates = self._keys[position:position + limit]
+        return [name for folded, name in candidates if folded.startswith(key)]
+
+
+# Общий индекс процесса: строится при старте приложения, обновляется в crud и при импорте
+term_index = PrefixIndex()
@@ -0,0 +1,107 @@
+"""Разбор файлов импорта (NDJSON, CSV) и построчная выгрузка терминов"""
+import codecs
+import csv
+import json
+import os
+
+# FAST_JSON=1 включает кодирование страниц GET /terms и выгрузки через orjson
+# (pip install orjson, в несколько раз быстрее). По умолчанию - стандартный json
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+if FAST_JSON:
+    try:
+        import orjson
+    except ImportError:
+        raise ImportError("FAST_JSON=1 требует пакет orjson: pip install orjson")
+else:
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+
+async def read_chunks(upload, chunk_size: int = CHUNK_SIZE):
+    """Содержимое загруженного файла кусками, не читая его в память целиком"""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+async def iter_lines(chunks):
+    """Строки текста в UTF-8 (BOM в начале файла отбрасывается) из потока байтов"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+async def iter_ndjson(lines):
+    """(номер строки, словарь полей, ошибка) для каждой непустой строки NDJSON"""
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"Некорректный JSON: {e}"
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, "Ожидался JSON-объект"
+
+async def iter_csv(lines):
+    """(номер строки, словарь полей, ошибка) для записей CSV с заголовком
+
+    Запись может занимать несколько строк, если поле в кавычках содержит перевод
+    строки: строки копятся, пока число кавычек нечетное. Пустые значения
+    пропускаются, чтобы для них сработали значения по умолчанию.
+    """
+    header, record, start, number = None, "", 0, 0
+    async for line in lines:
+        number += 1
+        if not record:
+            start = number
+        record += line
+        if record.count('"') % 2:
+            continue
+        values, record = next(csv.reader([record]), []), ""
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"Ожидалось {len(header)} колонок, получено {len(values)}"
+            continue
+        yield start, {name: value for name, value in zip(header, values) if value != ""}, None
+    if record:
+        yield start, None, "Незакрытая кавычка в конце файла"
+
+def parse_records(chunks, fmt: str):
+    """Записи загруженного файла в формате ndjson или csv"""
+    parser = iter_csv if fmt == "csv" else iter_ndjson
+    return parser(iter_lines(chunks))
+
+def describe_validation_error(error) -> str:
+    """Короткое описание ошибки валидации pydantic в одну строку"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+def dumps_json(content) -> bytes:
+    """JSON без пробелов и экранирования не-ASCII, как у JSONResponse; через orjson при FAST_JSON=1"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def to_ndjson(rows) -> bytes:
+    """Пачка строк в виде NDJSON"""
+    if orjson is not None:
+        return b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+    return b"".join(dumps_json(row) + b"\n" for row in rows)
@@ -1,8 +1,13 @@
 from concurrent import futures
+import threading
 import grpc
 import glossary_pb2
 import glossary_pb2_grpc
 
+# Пачки StreamAllTerms: по умолчанию и наибольшая допустимая
+DEFAULT_STREAM_BATCH_SIZE = 500
+MAX_STREAM_BATCH_SIZE = 10000
+
 # База данных терминов Python (аналог books_by_category)
 terms_by_category = {
     glossary_pb2.GENERAL: [
@@ -19,23 +24,137 @@ terms_by_category = {
     ],
 }
 
+class TermStore:
+    """Термины по категориям и номер версии данных
+
+    Изменения не трогают старые списки, а подменяют словарь целиком, поэтому
+    snapshot() всегда отдает согласованную пару (версия, термины).
+    """
+
+    def __init__(self, terms):
+        self._lock = threading.Lock()
+        self._snapshot = (1, {category: list(items) for category, items in terms.items()})
+
+    @property
+    def version(self):
+        return self._snapshot[0]
+
+    def snapshot(self):
+        return self._snapshot
+
+    def add_term(self, term):
+        """Добавить термин в его категорию"""
+        with self._lock:
+            version, terms = self._snapshot
+            terms = dict(terms)
+            terms[term.category] = terms.get(term.category, []) + [term]
+            self._snapshot = (version + 1, terms)
+
+def _passthrough(response):
+    # Методы сервиса сами возвращают сериализованный GlossaryResponse
+    return response
+
 class GlossaryServicer(glossary_pb2_grpc.GlossaryServiceServicer):
+    """Сервис глоссария с готовыми ответами
+
+    Сериализованные GlossaryResponse хранятся для каждой категории и длины
+    выборки и для GetAllTerms. Кеш помечен версией TermStore и сбрасывается,
+    когда она меняется; повторный вызов только отдает готовые байты.
+    StreamAllTerms не кешируется: он нужен для больших глоссариев.
+    Регистрировать через add_to_server.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._cache = (None, {})  # (версия данных, ключ -> байты ответа)
+
     def GetTerms(self, request, context):
-        if request.category not in terms_by_category:
+        version, terms = self.store.snapshot()
+        if request.category not in terms:
             context.abort(grpc.StatusCode.NOT_FOUND, "Category not found")
-        
-        terms_for_category = terms_by_category[request.category]
-        return glossary_pb2.GlossaryResponse(terms=terms_for_category[:request.max_results])
-    
+
+        terms_for_category = terms[request.category]
+        # Срез [:max_results] определяется только своей длиной: max_results больше числа
+        # терминов и отрицательные значения попадают в те же ключи, что и равные им срезы
+        length = len(range(len(terms_for_category))[:request.max_results])
+        return self._cached(
+            version, (request.category, length),
+            lambda: glossary_pb2.GlossaryResponse(terms=terms_for_category[:length])
+        )
+
     def GetAllTerms(self, request, context):
-        all_terms = []
-        for terms_list in terms_by_category.values():
-            all_terms.extend(terms_list)
-        return glossary_pb2.GlossaryResponse(terms=all_terms)
+        version, terms = self.store.snapshot()
+
+        def build():
+            all_terms = []
+            for terms_list in terms.values():
+                all_terms.extend(terms_list)
+            return glossary_pb2.GlossaryResponse(terms=all_terms)
+
+        return self._cached(version, "all", build)
+
+    def StreamAllTerms(self, request, context):
+        """Все термины пачками по batch_size
+
+        Следующая пачка собирается, только когда gRPC готов ее отправить,
+        так что медленный клиент сдерживает сервер (flow control).
+        """
+        batch_size = request.batch_size or DEFAULT_STREAM_BATCH_SIZE
+        if not 0 < batch_size <= MAX_STREAM_BATCH_SIZE:
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"batch_size must be between 1 and {MAX_STREAM_BATCH_SIZE}"
+            )
+
+        version, terms = self.store.snapshot()
+        batch = []
+        for terms_list in terms.values():
+            for term in terms_list:
+                batch.append(term)
+                if len(batch) == batch_size:
+                    yield glossary_pb2.GlossaryResponse(terms=batch).SerializeToString()
+                    batch = []
+        if batch:
+            yield glossary_pb2.GlossaryResponse(terms=batch).SerializeToString()
+
+    def _cached(self, version, key, build):
+        cached_version, responses = self._cache
+        if cached_version != version:
+            responses = {}
+            # Запрос со старым снимком не должен затирать кеш новой версии
+            if cached_version is None or version > cached_version:
+                self._cache = (version, responses)
+        data = responses.get(key)
+        if data is None:
+            data = responses[key] = build().SerializeToString()
+        return data
+
+def add_to_server(servicer, server):
+    """Зарегистрировать сервис так, чтобы готовые байты ответа уходили без повторной сериализации"""
+    handlers = {
+        "GetTerms": grpc.unary_unary_rpc_method_handler(
+            servicer.GetTerms,
+            request_deserializer=glossary_pb2.TermRequest.FromString,
+            response_serializer=_passthrough,
+        ),
+        "GetAllTerms": grpc.unary_unary_rpc_method_handler(
+            servicer.GetAllTerms,
+            request_deserializer=glossary_pb2.Empty.FromString,
+            response_serializer=_passthrough,
+        ),
+        "StreamAllTerms": grpc.unary_stream_rpc_method_handler(
+            servicer.StreamAllTerms,
+            request_deserializer=glossary_pb2.StreamTermsRequest.FromString,
+            response_serializer=_passthrough,
+        ),
+    }
+    server.add_generic_rpc_handlers(
+        (grpc.method_handlers_generic_handler("glossary.GlossaryService", handlers),)
+    )
 
 def serve():
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    glossary_pb2_grpc.add_GlossaryServiceServicer_to_server(GlossaryServicer(), server)
+    add_to_server(GlossaryServicer(TermStore(terms_by_category)), server)
     server.add_insecure_port("[::]:50051")
     server.start()
     print("Glossary gRPC Server running on port 50051")
@@ -1,5 +1,6 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, stream_with_context
 import grpc
+import itertools
 import os
 import glossary_pb2
 import glossary_pb2_grpc
@@ -10,6 +11,8 @@ app = Flask(__name__)
 glossary_host = os.getenv("GLOSSARY_HOST", "localhost")
 glossary_channel = grpc.insecure_channel(f"{glossary_host}:50051")
 glossary_client = glossary_pb2_grpc.GlossaryServiceStub(glossary_channel)
+# Сколько терминов сервис присылает в одном сообщении StreamAllTerms
+STREAM_BATCH_SIZE = int(os.getenv("GLOSSARY_STREAM_BATCH_SIZE", "500"))
 
 @app.route("/")
 def render_homepage():
@@ -26,21 +29,39 @@ def render_homepage():
         category="Functions"
     )
 
+def term_to_dict(term):
+    return {
+        "id": term.id,
+        "name": term.name,
+        "definition": term.definition,
+        "category": glossary_pb2.TermCategory.Name(term.category)
+    }
+
 @app.route("/api/terms")
 def get_all_terms():
-    terms_request = glossary_pb2.Empty()
-    terms_response = glossary_client.GetAllTerms(terms_request)
-    
-    terms_list = []
-    for term in terms_response.terms:
-        terms_list.append({
-            "id": term.id,
-            "name": term.name,
-            "definition": term.definition,
-            "category": glossary_pb2.TermCategory.Name(term.category)
-        })
-    
-    return jsonify(terms_list)
+    # Термины приходят пачками и сразу уходят клиенту: весь глоссарий
+    # не держится в памяти ни в сервисе, ни здесь
+    batches = glossary_client.StreamAllTerms(
+        glossary_pb2.StreamTermsRequest(batch_size=STREAM_BATCH_SIZE)
+    )
+    # Первая пачка до ответа: ошибка gRPC превратится в 500, а не в оборванный JSON
+    first_batch = next(batches, None)
+
+    def generate():
+        try:
+            yield "["
+            separator = ""
+            if first_batch is not None:
+                for batch in itertools.chain([first_batch], batches):
+                    for term in batch.terms:
+                        yield separator + app.json.dumps(term_to_dict(term), separators=(",", ":"))
+                        separator = ","
+            yield "]"
+        finally:
+            # Клиент отключился раньше - остановить поток на стороне сервиса
+            batches.cancel()
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file